@@ -0,0 +1,149 @@
+import hashlib
+import os
+import platform
+import uuid
+from collections import namedtuple
+
+# --- Machine Fingerprint (System Code) ---
+# Shared by Indexing PRO (indexingpro.py) and the key generator (keyindex.py), so both
+# always compute byte-identical System Codes for the same machine.
+
+# Linux sources: DMI identifiers (some are readable by root only) and network interfaces
+DMI_ID_DIR = "/sys/class/dmi/id"
+NET_CLASS_DIR = "/sys/class/net"
+
+# Result of a fingerprint run: the System Code, the provider that produced it, and a warning
+# (or None) if the platform provider failed and the MAC-address fallback was used instead.
+Fingerprint = namedtuple("Fingerprint", ["system_code", "provider", "warning"])
+
+
+def normalize_mac(mac_address):
+    """Returns a MAC address as upper-case hex digits without separators ("aa:bb-cc" -> "AABBCC")."""
+    if not mac_address:
+        return ""
+    return "".join(ch for ch in str(mac_address) if ch.isalnum()).upper()
+
+
+def _clean(value):
+    """Strips a component value, treating None as empty."""
+    return str(value).strip() if value is not None else ""
+
+
+def fingerprint_from_components(components):
+    """Hashes the ordered fingerprint components into the upper-case System Code."""
+    raw_fingerprint_string = "-".join(_clean(component) for component in components).strip()
+    return hashlib.sha256(raw_fingerprint_string.encode('utf-8')).hexdigest().upper()
+
+
+class WindowsWmiProvider:
+    """
+    Reads CPU ID, baseboard serial, first fixed-disk serial and first IP-enabled MAC address
+    over a single WMI connection, asking only for the property each component needs.
+    """
+    name = "wmi"
+
+    def components(self):
+        import wmi # Raises ImportError if the 'wmi' module is not installed
+        c = wmi.WMI()
+
+        processors = c.Win32_Processor(["ProcessorId"])
+        cpu_id = _clean(getattr(processors[0], "ProcessorId", "")) if processors else ""
+
+        boards = c.Win32_BaseBoard(["SerialNumber"])
+        board_serial = _clean(getattr(boards[0], "SerialNumber", "")) if boards else ""
+
+        disks = c.Win32_DiskDrive(["SerialNumber", "MediaType"])
+        disk_serial = ""
+        for disk in disks:
+            if getattr(disk, "MediaType", "") != "Removable Media" and _clean(getattr(disk, "SerialNumber", "")):
+                disk_serial = _clean(disk.SerialNumber)
+                break
+        # Fallback for disk serial if not found or if only removable media
+        if not disk_serial and disks:
+            disk_serial = _clean(getattr(disks[0], "SerialNumber", ""))
+
+        mac_address = ""
+        for nic in c.Win32_NetworkAdapterConfiguration(["MACAddress"], IPEnabled=True):
+            if getattr(nic, "MACAddress", ""):
+                mac_address = normalize_mac(nic.MACAddress)
+                break
+
+        return [cpu_id, board_serial, disk_serial, mac_address]
+
+
+class LinuxSysfsProvider:
+    """
+    Reads the DMI product UUID, board serial and product serial from /sys/class/dmi/id and the
+    MAC address of the first physical network interface from /sys/class/net.
+    """
+    name = "sysfs"
+
+    def __init__(self, dmi_dir=DMI_ID_DIR, net_dir=NET_CLASS_DIR):
+        self.dmi_dir = dmi_dir
+        self.net_dir = net_dir
+
+    def _read(self, *parts):
+        try:
+            with open(os.path.join(*parts), 'r') as f:
+                return f.read().strip()
+        except OSError: # Missing, or readable by root only
+            return ""
+
+    def _mac_address(self):
+        try:
+            interfaces = sorted(os.listdir(self.net_dir))
+        except OSError:
+            return ""
+        candidates = []
+        for interface in interfaces:
+            mac = normalize_mac(self._read(self.net_dir, interface, "address"))
+            if interface == "lo" or not mac or set(mac) == {"0"}:
+                continue
+            # Physical interfaces have a 'device' link; virtual ones (bridges, docker, veth) do not
+            is_physical = os.path.exists(os.path.join(self.net_dir, interface, "device"))
+            candidates.append((not is_physical, interface, mac))
+        return min(candidates)[2] if candidates else ""
+
+    def components(self):
+        product_uuid = self._read(self.dmi_dir, "product_uuid").upper()
+        board_serial = self._read(self.dmi_dir, "board_serial")
+        product_serial = self._read(self.dmi_dir, "product_serial")
+        mac_address = self._mac_address()
+        if not (product_uuid or board_serial or product_serial or mac_address):
+            raise OSError(f"No machine identifiers could be read from {self.dmi_dir} or {self.net_dir}.")
+        return [product_uuid, board_serial, product_serial, mac_address]
+
+
+class MacAddressProvider:
+    """Fallback for any platform: the MAC address reported by uuid.getnode()."""
+    name = "mac"
+
+    def components(self):
+        return ["", "", "", normalize_mac(f"{uuid.getnode():012X}")]
+
+
+def select_provider(system=None):
+    """Returns the fingerprint provider for the given (or current) platform."""
+    system = system or platform.system()
+    if system == "Windows":
+        return WindowsWmiProvider()
+    if system == "Linux":
+        return LinuxSysfsProvider()
+    return MacAddressProvider()
+
+
+def get_machine_fingerprint(provider=None):
+    """
+    Computes the System Code for this machine. If the platform provider fails (for example
+    the 'wmi' module is missing), falls back to the MAC address and reports why in `warning`.
+    """
+    provider = provider or select_provider()
+    try:
+        return Fingerprint(fingerprint_from_components(provider.components()), provider.name, None)
+    except ImportError:
+        warning = "The 'wmi' module is not installed. For a more robust machine ID, please install it using: pip install wmi"
+    except Exception as e:
+        warning = f"Could not retrieve full machine ID ({provider.name}): {e}"
+    fallback = MacAddressProvider()
+    return Fingerprint(fingerprint_from_components(fallback.components()), fallback.name,
+                       f"{warning}\nFalling back to MAC address.")
@@ -2,14 +2,25 @@ import os
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import re
-import uuid # Original for MAC address, kept as fallback
 import hashlib # For hashing the machine ID to create an activation key
 import json # For saving and loading activation status
-import platform # To check OS for WMI
-try:
-    import wmi # For detailed Windows machine ID
-except ImportError:
-    wmi = None # Set to None if WMI is not available
+import sys
+import platform # To hide staging folders on Windows
+import argparse # For command-line switches such as --profile
+import functools
+import cProfile # For the optional --profile switch
+import pstats
+import datetime
+import csv # For fill-status reports
+import stat
+import socket # Worker names in shared build plans
+import time
+import threading
+import shutil
+import tempfile # Hidden staging folders for staged builds
+from collections import OrderedDict # For the least-recently-used book preset store
+from concurrent.futures import ThreadPoolExecutor # For auditing cartons in parallel
+from fingerprint import get_machine_fingerprint # Shared with keyindex.py
 
 # --- IMPORTANT: Secret Phrase for Activation Key Generation ---
 # This MUST be IDENTICAL to the one in your Easy File Renamer App's key generator.
@@ -19,6 +30,1173 @@ AUTHORIZED_SECRET_PHRASE = "MyCustomSecretPhraseForRenamerApp2025!"
 # This file will store whether the application has been activated.
 ACTIVATION_FILE = "activation_status.json"
 
+# --- Book Preset Store ---
+# Book lists of past runs, keyed by 4-digit code, so repeat cartons need no re-entry.
+PRESETS_FILE = "book_presets.json"
+PRESETS_MAX_ENTRIES = 500 # Least recently used codes are dropped beyond this
+
+# --- Staged Build Configuration ---
+# Staged builds are made in a hidden sibling folder and published with a rename when complete.
+STAGING_PREFIX = ".indexingpro-staging-"
+
+# --- I/O Scheduler Configuration ---
+# Limits how hard folder creation in this process hits shared storage. Each process (the GUI,
+# every --run-plan worker) has its own limiter; there is no coordination between processes.
+# Override with the environment variable below or --io-ops-per-second; 0 means no ceiling.
+IO_OPS_ENV_VAR = "INDEXINGPRO_IO_OPS"
+IO_MAX_OPS_PER_SECOND = 250 # Ceiling for all folder operations of this process
+IO_BATCH_SHARE = 0.5 # Batch work (plan workers) runs at this fraction of the ceiling
+IO_MIN_OPS_PER_SECOND = 5 # The adaptive back-off never goes below this
+IO_LATENCY_BACKOFF_FACTOR = 3.0 # Back off when average mkdir latency exceeds this multiple of the best seen...
+IO_LATENCY_FLOOR = 0.005 # ...and is above this many seconds (ignores jitter on fast local disks)
+PRIORITY_INTERACTIVE = 0 # GUI runs
+PRIORITY_BATCH = 1 # Plan workers and other background jobs
+
+# --- Build Plan Configuration ---
+# A plan file lists every folder of a job so several desks can build it in parallel.
+PLAN_VERSION = 1
+PLAN_BOOKS_PER_SHARD = 5 # Books per shard when a plan is exported
+PLAN_STATE_SUFFIX = ".shards" # Lock/done/failed files live in "<plan name>.shards" next to the plan
+
+# --- Profiling Configuration ---
+# Profiling is switched on with --profile or by setting this environment variable to 1/true/yes.
+PROFILE_ENV_VAR = "INDEXINGPRO_PROFILE"
+PROFILE_STATS_FILE = "indexingpro_profile.prof" # Raw cProfile stats (open with pstats or snakeviz)
+PROFILE_SUMMARY_FILE = "indexingpro_profile.txt" # Short human-readable hot-function summary
+PROFILE_TOP_N = 25 # Number of functions listed in the summary
+# Methods wrapped by the profiler. Startup (__init__) is profiled by the launcher itself.
+PROFILED_METHODS = ("generate_sub_folder_inputs", "_create_nested_folders_logic")
+
+# --- Fill Status Configuration ---
+# Per-folder scan results are cached by directory mtime so repeat reports only rescan what changed.
+FILL_CACHE_FILE = "fill_status_cache.json"
+FILL_IGNORED_FILES = {"Thumbs.db", "desktop.ini", ".DS_Store"} # System files that do not count as work
+
+# --- Carton Detection ---
+# Optional "WF_" followed by exactly four digits at the start of a carton folder name.
+CARTON_CODE_PATTERN = re.compile(r"^(?:WF_)?(\d{4})", re.IGNORECASE)
+
+
+def profiling_requested(argv_flag=False):
+    """Returns True if profiling was requested on the command line or via PROFILE_ENV_VAR."""
+    if argv_flag:
+        return True
+    return os.environ.get(PROFILE_ENV_VAR, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class RunProfiler:
+    """
+    Collects cProfile data for selected sections of a run.
+    Nothing is wrapped unless `instrument` is called, so a disabled profiler costs nothing.
+    """
+    def __init__(self, top_n=PROFILE_TOP_N):
+        self.profile = cProfile.Profile()
+        self.top_n = top_n
+        self._depth = 0 # Sections may nest (startup calls generate_sub_folder_inputs)
+
+    def __enter__(self):
+        if self._depth == 0:
+            self.profile.enable()
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._depth -= 1
+        if self._depth == 0:
+            self.profile.disable()
+        return False
+
+    def wrap(self, func):
+        """Returns a version of `func` that runs inside this profiler."""
+        @functools.wraps(func)
+        def profiled(*args, **kwargs):
+            with self:
+                return func(*args, **kwargs)
+        return profiled
+
+    def instrument(self, cls, method_names=PROFILED_METHODS):
+        """Replaces the named methods of `cls` with profiled versions."""
+        for name in method_names:
+            setattr(cls, name, self.wrap(getattr(cls, name)))
+
+    def dump(self, output_dir):
+        """
+        Writes the raw stats file and the top-N summary into `output_dir`.
+        Returns the paths of the two files written.
+        """
+        stats_path = os.path.join(output_dir, PROFILE_STATS_FILE)
+        summary_path = os.path.join(output_dir, PROFILE_SUMMARY_FILE)
+        self.profile.dump_stats(stats_path)
+        with open(summary_path, 'w') as f:
+            stats = pstats.Stats(self.profile, stream=f)
+            f.write(f"Top {self.top_n} functions by cumulative time\n\n")
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+            f.write(f"\nTop {self.top_n} functions by own time\n\n")
+            stats.sort_stats(pstats.SortKey.TIME).print_stats(self.top_n)
+        return stats_path, summary_path
+
+
+# --- Folder Naming ---
+# Fixed folders created inside every book folder, before its chapter folders.
+FIXED_SUB_SUB_FOLDERS = (
+    "Cover", "Front Index", "Acknowledgements", "Note About On The Author",
+    "Author's Note", "Prologue", "Epilogue", "Back Index", "About The Author",
+    "Prelude", "Preface", "Index", "Bibliography", "Appendix", "Notes"
+)
+CHAPTER_FORMATS = ("Digits", "Words", "Null")
+NULL_NAME_SUFFIX = "_Null Name"
+
+
+def number_to_word(num):
+    """
+    Converts a number (1-300) to its word representation.
+    Adds double space between tens and units words for numbers > 20.
+    """
+    if not isinstance(num, int) or num < 1 or num > 300:
+        return str(num) # Fallback to string for unsupported range
+
+    words_under_20 = {
+        1: "One", 2: "Two", 3: "Three", 4: "Four", 5: "Five",
+        6: "Six", 7: "Seven", 8: "Eight", 9: "Nine", 10: "Ten",
+        11: "Eleven", 12: "Twelve", 13: "Thirteen", 14: "Fourteen", 15: "Fifteen",
+        16: "Sixteen", 17: "Seventeen", 18: "Eighteen", 19: "Nineteen"
+    }
+
+    tens_words = {
+        20: "Twenty", 30: "Thirty", 40: "Forty", 50: "Fifty",
+        60: "Sixty", 70: "Seventy", 80: "Eighty", 90: "Ninety"
+    }
+
+    if num < 20:
+        return words_under_20[num]
+    elif num < 100:
+        tens = (num // 10) * 10
+        units = num % 10
+        if units == 0:
+            return tens_words[tens]
+        else:
+            # Apply double space for numbers after 20 (e.g., 21, 35)
+            return f"{tens_words[tens]}  {words_under_20[units]}"
+    elif num < 301:
+        hundreds = num // 100
+        remainder = num % 100
+
+        hundreds_word = ""
+        if hundreds == 1:
+            hundreds_word = "One Hundred"
+        elif hundreds == 2:
+            hundreds_word = "Two Hundred"
+        elif hundreds == 3:
+            hundreds_word = "Three Hundred"
+
+        if remainder == 0:
+            return hundreds_word
+        else:
+            # The recursive call number_to_word(remainder) will apply the double space
+            # if 'remainder' is between 21-99.
+            return f"{hundreds_word} and {number_to_word(remainder)}"
+    else:
+        return str(num)
+
+
+def book_folder_name(main_folder_code, book_name):
+    """Name of a book folder: WF_[Code]_[Book Name]."""
+    return f"WF_{main_folder_code}_{book_name}"
+
+
+def fixed_folder_name(main_folder_code, book_name, fixed_name):
+    """Name of a fixed folder inside a book folder: WF_[Code]_[Book Name]_[Fixed Name]."""
+    return f"WF_{main_folder_code}_{book_name}_{fixed_name}"
+
+
+def chapter_folder_name(main_folder_code, book_name, chapter_number, chapter_format):
+    """Name of chapter folder `chapter_number` in the given format ("Digits", "Words" or "Null")."""
+    if chapter_format == "Null":
+        chapter_label = f"Null ({chapter_number})"
+    elif chapter_format == "Words":
+        chapter_label = number_to_word(chapter_number)
+    else: # "Digits" (default)
+        chapter_label = str(chapter_number)
+    return f"WF_{main_folder_code}_{book_name}_Chapter {chapter_label}{NULL_NAME_SUFFIX}"
+
+
+def expected_book_children(main_folder_code, book_name, num_chapters, chapter_format):
+    """All folder names `_create_nested_folders_logic` creates inside one book folder, in creation order."""
+    children = [fixed_folder_name(main_folder_code, book_name, fixed_name) for fixed_name in FIXED_SUB_SUB_FOLDERS]
+    children.extend(chapter_folder_name(main_folder_code, book_name, k, chapter_format)
+                    for k in range(1, num_chapters + 1))
+    return children
+
+
+def default_book_row(index):
+    """Returns the placeholder (name, chapter count) shown in a fresh grid for the book at `index`."""
+    if index == 0: return "Book A", 5
+    if index == 1: return "Book B", 3
+    if index == 2: return "Book C", 7
+    return f"Book {index+1}", 5
+
+
+# --- I/O Scheduling ---
+class IOScheduler:
+    """
+    Per-process rate limiter for folder operations against shared storage. Operations start at
+    most `max_ops_per_second` apart, shared by all callers in the process; batch operations use
+    only `batch_share` of that rate, so background jobs are gentler than interactive GUI runs.
+    The rate adapts: it is halved when the average operation latency climbs well above the best
+    seen (the NAS is struggling) and creeps back up while latency stays normal.
+    """
+    def __init__(self, max_ops_per_second=IO_MAX_OPS_PER_SECOND, batch_share=IO_BATCH_SHARE):
+        self.max_ops_per_second = max_ops_per_second
+        self.batch_share = batch_share
+        self.current_ops_per_second = max_ops_per_second
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+        self._average_latency = None
+        self._best_latency = None
+        self._last_backoff = 0.0
+
+    def _interval(self, priority):
+        """Seconds between operation starts for `priority` at the current adaptive rate."""
+        rate = self.current_ops_per_second
+        if priority != PRIORITY_INTERACTIVE:
+            rate *= self.batch_share
+        return 1.0 / max(rate, IO_MIN_OPS_PER_SECOND)
+
+    def _wait_for_turn(self, priority):
+        if not self.max_ops_per_second:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self._interval(priority)
+        if start > now:
+            time.sleep(start - now)
+
+    def _record_latency(self, latency):
+        if not self.max_ops_per_second:
+            return
+        with self._lock:
+            if self._average_latency is None:
+                self._average_latency = latency
+            else:
+                self._average_latency = 0.8 * self._average_latency + 0.2 * latency
+            if self._best_latency is None or self._average_latency < self._best_latency:
+                self._best_latency = self._average_latency
+
+            now = time.monotonic()
+            if self._average_latency > max(self._best_latency * IO_LATENCY_BACKOFF_FACTOR, IO_LATENCY_FLOOR):
+                if now - self._last_backoff > 1.0: # At most one halving per second
+                    self.current_ops_per_second = max(IO_MIN_OPS_PER_SECOND, self.current_ops_per_second / 2)
+                    self._last_backoff = now
+            else:
+                self.current_ops_per_second = min(self.max_ops_per_second,
+                                                  self.current_ops_per_second + self.max_ops_per_second * 0.05)
+
+    def run(self, func, *args, priority=PRIORITY_INTERACTIVE, **kwargs):
+        """Calls `func(*args, **kwargs)` once the rate limit allows another operation of `priority`."""
+        self._wait_for_turn(priority)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._record_latency(time.perf_counter() - started)
+
+
+_io_scheduler = None
+
+
+def _int_from_environment(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        print(f"Warning: Ignoring invalid {name}={os.environ[name]!r}.")
+        return default
+
+
+def get_io_scheduler():
+    """The process-wide I/O scheduler, configured from the environment on first use."""
+    global _io_scheduler
+    if _io_scheduler is None:
+        _io_scheduler = IOScheduler(_int_from_environment(IO_OPS_ENV_VAR, IO_MAX_OPS_PER_SECOND))
+    return _io_scheduler
+
+
+def configure_io_scheduler(max_ops_per_second):
+    """Replaces the process-wide I/O scheduler with one using the given ceiling."""
+    global _io_scheduler
+    _io_scheduler = IOScheduler(max_ops_per_second)
+    return _io_scheduler
+
+
+# --- Staged Builds ---
+def make_staging_directory(parent_directory):
+    """
+    Creates a hidden staging folder inside `parent_directory`, so it is on the same filesystem
+    as the folders it will be renamed to. Returns its path.
+    """
+    staging_path = tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=parent_directory)
+    if platform.system() == "Windows":
+        try:
+            import ctypes
+            ctypes.windll.kernel32.SetFileAttributesW(staging_path, 0x02) # FILE_ATTRIBUTE_HIDDEN
+        except (ImportError, AttributeError, OSError):
+            pass
+    return staging_path
+
+
+def publish_staged_folder(staged_path, target_path):
+    """
+    Moves a finished staged folder to `target_path` with a single rename. If the target already
+    exists, the staged contents are merged into it instead, each missing entry moved with its own rename.
+    """
+    if not os.path.exists(target_path):
+        os.rename(staged_path, target_path)
+        return
+    with os.scandir(staged_path) as entries:
+        children = [(entry.name, entry.is_dir(follow_symlinks=False)) for entry in entries]
+    for child_name, is_dir in children:
+        staged_child = os.path.join(staged_path, child_name)
+        target_child = os.path.join(target_path, child_name)
+        if not os.path.exists(target_child):
+            os.rename(staged_child, target_child)
+        elif is_dir and os.path.isdir(target_child):
+            publish_staged_folder(staged_child, target_child)
+    shutil.rmtree(staged_path, ignore_errors=True)
+
+
+# --- Folder Creation ---
+# Creating folders relative to an open directory handle (dir_fd) saves the kernel from resolving the
+# full share path again for every mkdir. Not available on Windows, where absolute paths are used instead.
+DIR_FD_SUPPORTED = os.mkdir in os.supports_dir_fd and os.open in os.supports_dir_fd and hasattr(os, "O_DIRECTORY")
+
+
+class DirectoryHandle:
+    """
+    An existing directory in which child folders are created. When `use_dir_fd` is set and the
+    platform supports it, the directory is opened once and children are created relative to that
+    handle, so a rename of any parent mid-run cannot send them elsewhere. Otherwise (or if opening
+    fails) children are created by absolute path with os.makedirs.
+    """
+    def __init__(self, path, use_dir_fd=True, parent=None, name=None, scheduler=None, priority=PRIORITY_INTERACTIVE):
+        self.path = path
+        self.fd = None
+        self.scheduler = scheduler
+        self.priority = priority
+        if use_dir_fd and DIR_FD_SUPPORTED:
+            try:
+                flags = os.O_RDONLY | os.O_DIRECTORY
+                if parent is not None and parent.fd is not None:
+                    self.fd = os.open(name, flags, dir_fd=parent.fd)
+                else:
+                    self.fd = os.open(path, flags)
+            except OSError:
+                self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def mkdir(self, name):
+        """
+        Creates the child folder `name` if it does not exist yet. Returns its full path.
+        With a scheduler, the operation waits for its turn under the scheduler's limits.
+        """
+        if self.scheduler is not None:
+            return self.scheduler.run(self._mkdir, name, priority=self.priority)
+        return self._mkdir(name)
+
+    def _mkdir(self, name):
+        child_path = os.path.join(self.path, name)
+        if self.fd is None or os.sep in name or (os.altsep and os.altsep in name):
+            os.makedirs(child_path, exist_ok=True)
+            return child_path
+        try:
+            os.mkdir(name, dir_fd=self.fd)
+        except FileExistsError:
+            # Same rule as os.makedirs(exist_ok=True): an existing folder is fine, an existing file is not
+            if not stat.S_ISDIR(os.stat(name, dir_fd=self.fd).st_mode):
+                raise
+        return child_path
+
+    def child(self, name):
+        """Creates the child folder `name` if needed and returns a handle opened on it."""
+        child_path = self.mkdir(name)
+        return DirectoryHandle(child_path, use_dir_fd=self.fd is not None, parent=self, name=name,
+                               scheduler=self.scheduler, priority=self.priority)
+
+
+def _match_chapter_format(value):
+    """Returns the chapter format named by `value` ("digits", "Word", ...), or None."""
+    value = value.strip().lower()
+    for chapter_format in CHAPTER_FORMATS:
+        if value in (chapter_format.lower(), chapter_format.lower().rstrip("s")):
+            return chapter_format
+    return None
+
+
+# Column titles that mark the first pasted line as a header row rather than a book
+BOOK_LIST_HEADER_TITLES = {"chapters", "chapter", "chapter count", "chapters count", "no. of chapters", "count"}
+
+
+def _is_book_list_header(line, separator):
+    """True if a column after the first is titled like a chapter-count header ("Chapters", "Count", ...)."""
+    return any(_normalize_folder_name(field) in BOOK_LIST_HEADER_TITLES for field in line.split(separator)[1:])
+
+
+def parse_book_list(text):
+    """
+    Parses pasted lines of "name, chapters[, format]" into book dicts. Columns may also be
+    tab-separated (spreadsheet copy); commas inside the name are kept. Blank lines are skipped,
+    as is a first non-blank line whose count column is titled (e.g. "Name, Chapters, Format").
+    Raises ValueError naming the bad line.
+    """
+    books = []
+    first_line = True
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        is_first_line, first_line = first_line, False
+        separator = "\t" if "\t" in line else ","
+        fields = line.rsplit(separator, 2)
+        chapter_format = _match_chapter_format(fields[-1]) if len(fields) == 3 else None
+        if chapter_format:
+            line_without_format = line.rsplit(separator, 1)[0]
+        else:
+            chapter_format, line_without_format = "Digits", line
+        if separator not in line_without_format:
+            raise ValueError(f"line {line_number} needs at least a name and a chapter count: {line.strip()!r}")
+        name, chapters = (field.strip() for field in line_without_format.rsplit(separator, 1))
+        if not chapters.isdigit():
+            if is_first_line and _is_book_list_header(line, separator):
+                continue # Header row
+            raise ValueError(f"line {line_number} has an invalid chapter count {chapters!r}")
+        if not name or int(chapters) <= 0:
+            raise ValueError(f"line {line_number} needs a name and a positive chapter count: {line.strip()!r}")
+        books.append({'name': name, 'chapters': int(chapters), 'format': chapter_format})
+    return books
+
+
+def extract_carton_code(folder_name):
+    """Returns the 4-digit carton code at the start of `folder_name`, or an empty string."""
+    match = CARTON_CODE_PATTERN.match(folder_name)
+    return match.group(1) if match else ""
+
+
+def _has_book_folders(carton_path, code):
+    """True if `carton_path` already contains at least one WF_[code]_[Book] folder."""
+    book_prefix = f"WF_{code}_".lower()
+    try:
+        with os.scandir(carton_path) as entries:
+            for entry in entries:
+                if entry.name.lower().startswith(book_prefix) and entry.is_dir(follow_symlinks=False):
+                    return True
+    except OSError:
+        pass
+    return False
+
+
+def scan_parent_for_cartons(parent_directory):
+    """
+    Scans `parent_directory` once and returns every carton directory found in it,
+    sorted by name. Each carton is a dict with 'name', 'path', 'code' and 'has_books'.
+    """
+    cartons = []
+    with os.scandir(parent_directory) as entries:
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            code = extract_carton_code(entry.name)
+            if code:
+                cartons.append({'name': entry.name, 'path': entry.path, 'code': code})
+    cartons.sort(key=lambda carton: carton['name'].lower())
+    for carton in cartons:
+        carton['has_books'] = _has_book_folders(carton['path'], carton['code'])
+    return cartons
+
+
+# --- Structural Audit ---
+def _normalize_folder_name(name):
+    """Case- and whitespace-insensitive form of a folder name, used to spot misnamed folders."""
+    return " ".join(name.split()).casefold()
+
+
+# Reverse lookup for "Words" chapter labels (normalized, so "Twenty  One" and "twenty one" both match)
+_WORD_TO_NUMBER = {_normalize_folder_name(number_to_word(n)): n for n in range(1, 301)}
+_NULL_CHAPTER_PATTERN = re.compile(r"^null \((\d+)\)$")
+
+
+def _parse_chapter_folder(folder_name, main_folder_code, book_name):
+    """
+    Returns (chapter_number, chapter_format) if `folder_name` looks like a chapter folder
+    of the given book (ignoring case and spacing), otherwise None.
+    """
+    normalized = _normalize_folder_name(folder_name)
+    prefix = _normalize_folder_name(f"WF_{main_folder_code}_{book_name}_Chapter") + " "
+    suffix = _normalize_folder_name(NULL_NAME_SUFFIX)
+    if not normalized.startswith(prefix) or not normalized.endswith(suffix):
+        return None
+    label = normalized[len(prefix):len(normalized) - len(suffix)].strip()
+
+    null_match = _NULL_CHAPTER_PATTERN.match(label)
+    if null_match:
+        return int(null_match.group(1)), "Null"
+    if label.isdigit():
+        return int(label), "Digits"
+    if label in _WORD_TO_NUMBER:
+        return _WORD_TO_NUMBER[label], "Words"
+    return None
+
+
+def _list_subdirectories(path):
+    """Names of the directories directly inside `path`, from a single scandir listing."""
+    with os.scandir(path) as entries:
+        return {entry.name for entry in entries if entry.is_dir()}
+
+
+def audit_book(book_path, main_folder_code, book_name, num_chapters=None, chapter_format=None):
+    """
+    Compares one book folder against the layout `_create_nested_folders_logic` produces.
+    If the chapter count or format is not given, they are inferred from the chapter folders present.
+    Returns a dict with the expected layout and the 'missing', 'extra' and 'misnamed' folders.
+    """
+    actual = _list_subdirectories(book_path)
+
+    if num_chapters is None or chapter_format is None:
+        chapters_by_format = {}
+        for folder_name in actual:
+            parsed = _parse_chapter_folder(folder_name, main_folder_code, book_name)
+            if parsed:
+                chapters_by_format.setdefault(parsed[1], []).append(parsed[0])
+        if chapters_by_format:
+            inferred_format = max(chapters_by_format, key=lambda fmt: len(chapters_by_format[fmt]))
+            inferred_chapters = max(max(numbers) for numbers in chapters_by_format.values())
+        else:
+            inferred_format, inferred_chapters = "Digits", 0
+        chapter_format = chapter_format or inferred_format
+        num_chapters = inferred_chapters if num_chapters is None else num_chapters
+
+    expected = set(expected_book_children(main_folder_code, book_name, num_chapters, chapter_format))
+    missing = expected - actual
+    extra = actual - expected
+
+    # An extra folder is "misnamed" if it differs from a missing one only by case/spacing,
+    # or if it is a chapter folder whose expected counterpart (same number) is missing.
+    missing_by_key = {_normalize_folder_name(name): name for name in missing}
+    missing_by_chapter = {}
+    for name in missing:
+        parsed = _parse_chapter_folder(name, main_folder_code, book_name)
+        if parsed:
+            missing_by_chapter[parsed[0]] = name
+    misnamed = []
+    for name in sorted(extra):
+        expected_name = missing_by_key.get(_normalize_folder_name(name))
+        if expected_name is None:
+            parsed = _parse_chapter_folder(name, main_folder_code, book_name)
+            if parsed:
+                expected_name = missing_by_chapter.get(parsed[0])
+        if expected_name is not None and expected_name in missing:
+            misnamed.append({'found': name, 'expected': expected_name})
+            missing.discard(expected_name)
+            extra.discard(name)
+
+    return {
+        'name': book_name,
+        'path': book_path,
+        'chapters': num_chapters,
+        'format': chapter_format,
+        'missing': sorted(missing),
+        'extra': sorted(extra),
+        'misnamed': misnamed,
+        'ok': not (missing or extra or misnamed),
+    }
+
+
+def audit_carton(carton_path, main_folder_code=None, book_data=None, layout_source=None):
+    """
+    Audits every book folder in one carton. `book_data` (a list of {'name', 'chapters', 'format'})
+    is optional; when given, the chapter layout is taken from it, absent books are reported and book
+    folders not in the list are reported under 'extra_books'. Without it the layout is only inferred
+    from the folders present, so deleted trailing chapters or books cannot be detected; the report
+    marks this with layout_source "inferred". Book folders are matched ignoring case and spacing, so a
+    renamed one is reported under 'misnamed_books'; any other folder is listed under 'extra_folders'.
+    """
+    main_folder_code = main_folder_code or extract_carton_code(os.path.basename(os.path.normpath(carton_path)))
+    layout_source = layout_source or ("book list" if book_data else "inferred")
+    report = {'path': carton_path, 'code': main_folder_code, 'layout_source': layout_source,
+              'books': [], 'missing_books': [], 'extra_books': [], 'misnamed_books': [], 'extra_folders': [],
+              'error': None}
+    if not main_folder_code:
+        report['error'] = "Carton folder name does not start with a valid 4-digit code."
+        report['ok'] = False
+        return report
+
+    try:
+        book_prefix = f"WF_{main_folder_code}_"
+        folder_names = sorted(name for name in _list_subdirectories(carton_path)
+                              if not name.startswith(STAGING_PREFIX)) # Skip builds still in progress
+        book_folders = [name for name in folder_names if name.casefold().startswith(book_prefix.casefold())]
+        other_folders = [name for name in folder_names if name not in book_folders]
+
+        if book_data:
+            expected_books = {book['name']: book for book in book_data}
+        else:
+            expected_books = {name[len(book_prefix):]: {} for name in book_folders}
+        expected_by_key = {_normalize_folder_name(book_folder_name(main_folder_code, name)): name
+                           for name in expected_books}
+
+        # Pair each expected book with a folder: exact names first, then case/spacing variants
+        found_books = {}
+        for folder_name in book_folders:
+            if folder_name[len(book_prefix):] in expected_books and folder_name.startswith(book_prefix):
+                found_books[folder_name[len(book_prefix):]] = folder_name
+        for folder_name in book_folders:
+            if folder_name in found_books.values():
+                continue
+            book_name = expected_by_key.get(_normalize_folder_name(folder_name))
+            if book_name is not None and book_name not in found_books:
+                found_books[book_name] = folder_name
+                report['misnamed_books'].append({'found': folder_name,
+                                                 'expected': book_folder_name(main_folder_code, book_name)})
+            else:
+                report['extra_books'].append(folder_name)
+        # A folder that lost its WF_ prefix but still ends in a missing book's name is a misnamed book too
+        for folder_name in other_folders:
+            normalized = _normalize_folder_name(folder_name)
+            book_name = next((name for name in expected_books if name not in found_books
+                              and normalized.endswith(_normalize_folder_name(name))), None)
+            if book_data and book_name is not None:
+                found_books[book_name] = folder_name
+                report['misnamed_books'].append({'found': folder_name,
+                                                 'expected': book_folder_name(main_folder_code, book_name)})
+            else:
+                report['extra_folders'].append(folder_name)
+        report['missing_books'] = sorted(set(expected_books) - set(found_books))
+
+        for book_name in sorted(found_books):
+            book_spec = expected_books[book_name]
+            report['books'].append(audit_book(os.path.join(carton_path, found_books[book_name]),
+                                              main_folder_code, book_name,
+                                              book_spec.get('chapters'), book_spec.get('format')))
+    except OSError as e:
+        report['error'] = str(e)
+
+    report['ok'] = (report['error'] is None and not report['missing_books'] and not report['extra_books']
+                    and not report['misnamed_books'] and not report['extra_folders']
+                    and all(book['ok'] for book in report['books']))
+    return report
+
+
+def _expand_carton_paths(paths):
+    """Turns each path into a list of cartons: a carton folder stays as-is, any other folder is scanned for cartons."""
+    carton_paths = []
+    for path in paths:
+        if extract_carton_code(os.path.basename(os.path.normpath(path))):
+            carton_paths.append(path)
+        else:
+            carton_paths.extend(carton['path'] for carton in scan_parent_for_cartons(path))
+    return carton_paths
+
+
+def _expected_layout(carton_path, book_data, plan_books, presets):
+    """
+    Picks the expected book list for one carton: an explicit book list first, then the plan
+    the carton was built from, then the saved preset for its code. Returns (books, source).
+    """
+    if book_data:
+        return book_data, "book list"
+    books = plan_books.get(os.path.normcase(os.path.abspath(carton_path)))
+    if books:
+        return books, "plan"
+    if presets is not None:
+        code = extract_carton_code(os.path.basename(os.path.normpath(carton_path)))
+        books = presets.get(code, touch=False) if code else None
+        if books:
+            return books, "preset"
+    return None, "inferred"
+
+
+def audit_paths(paths, book_data=None, max_workers=None, plan_paths=(), presets=None):
+    """
+    Audits one or more cartons or shares (folders holding cartons) in parallel.
+    The expected layout comes from `book_data`, the cartons of any `plan_paths`, or `presets`
+    (a BookPresetCache), in that order; cartons with none of these are audited against an
+    inferred layout and listed under 'unverified'. Returns a JSON-serialisable report.
+    """
+    plan_books = {}
+    for plan_path in plan_paths:
+        for carton in load_plan(plan_path)['cartons']:
+            plan_books[os.path.normcase(os.path.abspath(carton['path']))] = carton['books']
+
+    # Layouts are resolved up front, so the preset store is only touched from this thread
+    jobs = [(path,) + _expected_layout(path, book_data, plan_books, presets) for path in _expand_carton_paths(paths)]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        cartons = list(executor.map(lambda job: audit_carton(job[0], book_data=job[1], layout_source=job[2]), jobs))
+    return {
+        'generated_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'ok': all(carton['ok'] for carton in cartons),
+        'unverified': [carton['path'] for carton in cartons if carton['layout_source'] == "inferred"],
+        'cartons': cartons,
+    }
+
+
+# --- Fill Status ---
+class FillStatusCache:
+    """
+    Remembers, per directory, its mtime, the number of files directly inside it and its
+    subdirectory names. A directory whose mtime is unchanged is not listed again.
+    The file is read on first use and written by `save`, which keeps only the directories
+    looked up through this instance, so deleted or renamed folders do not pile up.
+    """
+    def __init__(self, path=FILL_CACHE_FILE):
+        self.path = path
+        self._entries = None
+        self._seen = set() # Paths passed to `scan` since this cache was created
+        self._lock = threading.Lock()
+
+    def _load(self):
+        self._entries = {}
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                self._entries = json.load(f).get('directories', {})
+        except (json.JSONDecodeError, ValueError, AttributeError, OSError) as e:
+            print(f"Warning: Could not read fill-status cache from {self.path}: {e}. Rescanning everything.")
+            self._entries = {}
+
+    def scan(self, path):
+        """Returns (file_count, subdirectory_names) for `path`, listing it only if it changed."""
+        mtime_ns = os.stat(path).st_mtime_ns
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            self._seen.add(path)
+            cached = self._entries.get(path)
+        if cached and cached['mtime_ns'] == mtime_ns:
+            return cached['files'], cached['subdirs']
+
+        file_count = 0
+        subdirs = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif entry.name not in FILL_IGNORED_FILES and entry.is_file():
+                    file_count += 1
+        with self._lock:
+            self._entries[path] = {'mtime_ns': mtime_ns, 'files': file_count, 'subdirs': subdirs}
+        return file_count, subdirs
+
+    def save(self):
+        if self._entries is None:
+            return
+        temp_path = f"{self.path}.tmp"
+        try:
+            with self._lock:
+                # Drop directories this report did not reach (deleted, renamed or no longer scanned)
+                self._entries = {path: entry for path, entry in self._entries.items() if path in self._seen}
+                with open(temp_path, 'w') as f:
+                    json.dump({'directories': self._entries}, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Error saving fill-status cache to {self.path}: {e}")
+
+
+def _count_files(path, cache):
+    """Number of files in `path` and all folders below it."""
+    file_count, subdirs = cache.scan(path)
+    return file_count + sum(_count_files(os.path.join(path, name), cache) for name in subdirs)
+
+
+def fill_status_book(book_path, main_folder_code, book_name, cache):
+    """Counts the files in each fixed and chapter folder of one book."""
+    loose_files, child_names = cache.scan(book_path)
+    fixed_names = {fixed_folder_name(main_folder_code, book_name, fixed): fixed for fixed in FIXED_SUB_SUB_FOLDERS}
+    fixed, chapters, other = [], [], []
+    for child_name in child_names:
+        entry = {'folder': child_name, 'files': _count_files(os.path.join(book_path, child_name), cache)}
+        if child_name in fixed_names:
+            fixed.append(entry)
+        else:
+            parsed = _parse_chapter_folder(child_name, main_folder_code, book_name)
+            if parsed:
+                entry['chapter'] = parsed[0]
+                chapters.append(entry)
+            else:
+                other.append(entry)
+    fixed.sort(key=lambda entry: FIXED_SUB_SUB_FOLDERS.index(fixed_names[entry['folder']]))
+    chapters.sort(key=lambda entry: entry['chapter'])
+    other.sort(key=lambda entry: entry['folder'])
+    return {
+        'name': book_name,
+        'path': book_path,
+        'files': loose_files + sum(entry['files'] for entry in fixed + chapters + other),
+        'chapters_filled': sum(1 for entry in chapters if entry['files']),
+        'chapters_total': len(chapters),
+        'fixed_filled': sum(1 for entry in fixed if entry['files']),
+        'fixed_total': len(fixed),
+        'fixed': fixed,
+        'chapters': chapters,
+        'other': other,
+    }
+
+
+def fill_status_carton(carton_path, cache):
+    """Fill status of every book folder in one carton."""
+    main_folder_code = extract_carton_code(os.path.basename(os.path.normpath(carton_path)))
+    report = {'path': carton_path, 'code': main_folder_code, 'books': [], 'error': None}
+    try:
+        book_prefix = f"WF_{main_folder_code}_"
+        for folder_name in sorted(cache.scan(carton_path)[1]):
+            if folder_name.startswith(book_prefix):
+                report['books'].append(fill_status_book(os.path.join(carton_path, folder_name), main_folder_code,
+                                                        folder_name[len(book_prefix):], cache))
+    except OSError as e:
+        report['error'] = str(e)
+    report['files'] = sum(book['files'] for book in report['books'])
+    return report
+
+
+def fill_status_paths(paths, cache=None, max_workers=None):
+    """
+    Fill status of one or more cartons or shares, scanned in parallel.
+    Returns a JSON-serialisable report; the cache is saved afterwards.
+    """
+    cache = cache or FillStatusCache()
+    carton_paths = _expand_carton_paths(paths)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        cartons = list(executor.map(lambda path: fill_status_carton(path, cache), carton_paths))
+    cache.save()
+    return {
+        'generated_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'cartons': cartons,
+    }
+
+
+FILL_CSV_COLUMNS = ("carton", "code", "book", "files", "chapters_filled", "chapters_total", "fixed_filled", "fixed_total")
+
+
+def write_fill_status_csv(report, f):
+    """Writes one CSV row per book of a fill-status report."""
+    writer = csv.writer(f)
+    writer.writerow(FILL_CSV_COLUMNS)
+    for carton in report['cartons']:
+        for book in carton['books']:
+            writer.writerow([carton['path'], carton['code'], book['name'], book['files'],
+                             book['chapters_filled'], book['chapters_total'], book['fixed_filled'], book['fixed_total']])
+
+
+def write_fill_status_report(report, report_file):
+    """Writes a fill-status report as CSV if `report_file` ends in .csv, otherwise as JSON."""
+    if report_file.lower().endswith(".csv"):
+        with open(report_file, 'w', newline='') as f:
+            write_fill_status_csv(report, f)
+    else:
+        with open(report_file, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+# --- Book Presets ---
+class BookPresetCache:
+    """
+    Size-bounded, least-recently-used store of book lists keyed by carton code.
+    The file is only read on the first lookup and is rewritten after each `put`.
+    """
+    def __init__(self, path=PRESETS_FILE, max_entries=PRESETS_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries = None # OrderedDict of code -> book list, oldest first; None until loaded
+
+    def _load(self):
+        self._entries = OrderedDict()
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            for code, books in data.get('presets', []):
+                self._entries[code] = books
+        except (json.JSONDecodeError, ValueError, TypeError, AttributeError, OSError) as e:
+            print(f"Warning: Could not read book presets from {self.path}: {e}. Starting with an empty store.")
+            self._entries = OrderedDict()
+
+    def preload(self):
+        """Reads the store now if it has not been read yet (called once the UI is idle)."""
+        if self._entries is None:
+            self._load()
+
+    def get(self, code, touch=True):
+        """
+        Returns a copy of the book list last used for `code`, or None.
+        With touch=False (e.g. audits) the code's recency is left unchanged.
+        """
+        if self._entries is None:
+            self._load()
+        books = self._entries.get(code)
+        if books is None:
+            return None
+        if touch:
+            self._entries.move_to_end(code)
+        return [dict(book) for book in books]
+
+    def put(self, code, book_data):
+        """Remembers `book_data` for `code` and saves the store."""
+        if self._entries is None:
+            self._load()
+        self._entries[code] = [{'name': book['name'], 'chapters': book['chapters'], 'format': book['format']}
+                               for book in book_data]
+        self._entries.move_to_end(code)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._save()
+
+    def _save(self):
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump({'presets': list(self._entries.items())}, f)
+            os.replace(temp_path, self.path) # Never leave a half-written store behind
+        except OSError as e:
+            print(f"Error saving book presets to {self.path}: {e}")
+
+
+# --- Shardable Build Plans ---
+def plan_carton(base_directory, main_folder_code, book_data, skip_wf_folder=False):
+    """
+    Returns the folders `_create_nested_folders_logic` would create for one carton:
+    {'path', 'code', 'books': [{'name', 'chapters', 'format', 'folder', 'children'}]}.
+    """
+    carton_path = base_directory if skip_wf_folder else os.path.join(base_directory, f"WF_{main_folder_code}")
+    books = []
+    for book in book_data:
+        books.append({
+            'name': book['name'],
+            'chapters': book['chapters'],
+            'format': book['format'],
+            'folder': book_folder_name(main_folder_code, book['name']),
+            'children': expected_book_children(main_folder_code, book['name'], book['chapters'], book['format']),
+        })
+    return {'path': carton_path, 'code': main_folder_code, 'books': books}
+
+
+def build_plan(cartons, books_per_shard=PLAN_BOOKS_PER_SHARD):
+    """Splits the books of the planned `cartons` into shards of consecutive books."""
+    book_refs = [[carton_index, book_index]
+                 for carton_index, carton in enumerate(cartons)
+                 for book_index in range(len(carton['books']))]
+    books_per_shard = max(1, books_per_shard)
+    shards = [{'id': f"{number:04d}", 'books': book_refs[start:start + books_per_shard]}
+              for number, start in enumerate(range(0, len(book_refs), books_per_shard), start=1)]
+    return {
+        'version': PLAN_VERSION,
+        'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'cartons': cartons,
+        'shards': shards,
+    }
+
+
+def save_plan(plan, plan_path):
+    """
+    Writes `plan` to `plan_path`. Carton paths inside the plan's own folder are stored relative
+    to it, so desks that mount the share at a different path can still use the plan.
+    """
+    plan_dir = os.path.dirname(os.path.abspath(plan_path))
+    stored = dict(plan, cartons=[])
+    for carton in plan['cartons']:
+        carton_path = os.path.abspath(carton['path'])
+        try:
+            relative_path = os.path.relpath(carton_path, plan_dir)
+        except ValueError: # Different drive on Windows
+            relative_path = None
+        if relative_path and not relative_path.startswith(os.pardir):
+            carton_path = relative_path
+        stored['cartons'].append(dict(carton, path=carton_path.replace(os.sep, "/")))
+    temp_path = f"{plan_path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(stored, f, indent=2)
+    os.replace(temp_path, plan_path)
+
+
+def load_plan(plan_path):
+    """Reads a plan file and resolves its carton paths against the plan's folder."""
+    with open(plan_path, 'r') as f:
+        plan = json.load(f)
+    if plan.get('version') != PLAN_VERSION:
+        raise ValueError(f"Unsupported plan version: {plan.get('version')}")
+    plan_dir = os.path.dirname(os.path.abspath(plan_path))
+    for carton in plan['cartons']:
+        carton['path'] = os.path.normpath(os.path.join(plan_dir, carton['path'].replace("/", os.sep)))
+    return plan
+
+
+def plan_state_dir(plan_path):
+    """Folder holding the shard lock, done and failed files of a plan."""
+    return os.path.splitext(plan_path)[0] + PLAN_STATE_SUFFIX
+
+
+def _shard_file(state_dir, shard_id, kind):
+    return os.path.join(state_dir, f"shard-{shard_id}.{kind}")
+
+
+def _write_state_file(path, record):
+    """Writes a done/failed record atomically."""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(record, f)
+    os.replace(temp_path, path)
+
+
+def _claim_shard(state_dir, shard_id, worker_id, stale_after=None):
+    """
+    Claims a shard by creating its lock file exclusively. Running workers refresh their lock after
+    each book, so a lock untouched for `stale_after` seconds (left by a crashed worker) is taken over:
+    it is renamed away, and if the moved file turns out not to be the stale lock that was seen (another
+    worker took over and made a fresh lock in between) it is put back and the shard is skipped.
+    Returns True if this worker now owns the shard.
+    """
+    lock_path = _shard_file(state_dir, shard_id, "lock")
+    if stale_after is not None:
+        try:
+            seen = os.stat(lock_path)
+        except FileNotFoundError:
+            seen = None
+        if seen is not None and time.time() - seen.st_mtime > stale_after:
+            seen_owner = _lock_owner(lock_path)
+            moved_path = f"{lock_path}.stale-{worker_id}"
+            try:
+                os.rename(lock_path, moved_path)
+            except OSError:
+                return False # Another worker took it over first
+            if os.stat(moved_path).st_mtime_ns != seen.st_mtime_ns or _lock_owner(moved_path) != seen_owner:
+                os.rename(moved_path, lock_path) # Someone else's fresh (or just refreshed) lock: give it back
+                return False
+            os.remove(moved_path)
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, 'w') as f:
+        json.dump({'worker': worker_id, 'claimed_at': datetime.datetime.now().isoformat(timespec='seconds')}, f)
+    return True
+
+
+def _lock_owner(lock_path):
+    """Worker named in a lock file, or None if the lock is gone or unreadable."""
+    try:
+        with open(lock_path, 'r') as f:
+            return json.load(f).get('worker')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _refresh_lock(state_dir, shard_id, worker_id):
+    """Touches this worker's lock so other workers do not treat it as stale while work continues."""
+    lock_path = _shard_file(state_dir, shard_id, "lock")
+    if _lock_owner(lock_path) == worker_id:
+        try:
+            os.utime(lock_path)
+        except FileNotFoundError:
+            pass
+
+
+def _remove_if_present(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _release_shard(state_dir, shard_id, worker_id):
+    """Removes the shard's lock, but only if it still belongs to this worker (it may have been taken over)."""
+    lock_path = _shard_file(state_dir, shard_id, "lock")
+    if _lock_owner(lock_path) == worker_id:
+        _remove_if_present(lock_path)
+
+
+def apply_shard(plan, shard, use_dir_fd=True, priority=PRIORITY_BATCH, on_book_done=None):
+    """
+    Creates every book folder (and its fixed and chapter folders) listed in one shard.
+    `on_book_done`, if given, is called after each book (used to refresh the shard lock).
+    """
+    scheduler = get_io_scheduler()
+    for carton_index, book_index in shard['books']:
+        carton = plan['cartons'][carton_index]
+        book = carton['books'][book_index]
+        os.makedirs(carton['path'], exist_ok=True)
+        with DirectoryHandle(carton['path'], use_dir_fd, scheduler=scheduler, priority=priority) as carton_handle:
+            with carton_handle.child(book['folder']) as book_handle:
+                for child_name in book['children']:
+                    book_handle.mkdir(child_name)
+        if on_book_done:
+            on_book_done()
+
+
+def run_plan_worker(plan_path, worker_id=None, stale_after=None):
+    """
+    Claims and applies shards of a plan until none are left to claim. Shards that are done, or
+    claimed by another worker, are skipped; failed shards are released so a later run retries them.
+    Returns {'worker', 'done': [...], 'failed': [...]}.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    plan = load_plan(plan_path)
+    state_dir = plan_state_dir(plan_path)
+    os.makedirs(state_dir, exist_ok=True)
+
+    result = {'worker': worker_id, 'done': [], 'failed': []}
+    for shard in plan['shards']:
+        shard_id = shard['id']
+        if os.path.exists(_shard_file(state_dir, shard_id, "done")):
+            continue
+        if not _claim_shard(state_dir, shard_id, worker_id, stale_after):
+            continue
+        # Another worker may have finished the shard between our done check and claim
+        if os.path.exists(_shard_file(state_dir, shard_id, "done")):
+            _release_shard(state_dir, shard_id, worker_id)
+            continue
+        record = {'worker': worker_id, 'finished_at': None}
+        try:
+            apply_shard(plan, shard, on_book_done=lambda: _refresh_lock(state_dir, shard_id, worker_id))
+            record['finished_at'] = datetime.datetime.now().isoformat(timespec='seconds')
+            _write_state_file(_shard_file(state_dir, shard_id, "done"), record)
+            _remove_if_present(_shard_file(state_dir, shard_id, "failed"))
+            result['done'].append(shard_id)
+        except Exception as e:
+            record['error'] = str(e)
+            record['finished_at'] = datetime.datetime.now().isoformat(timespec='seconds')
+            _write_state_file(_shard_file(state_dir, shard_id, "failed"), record)
+            result['failed'].append(shard_id)
+        finally:
+            _release_shard(state_dir, shard_id, worker_id)
+    return result
+
+
+def plan_status(plan_path):
+    """Reports which shards of a plan are done, claimed (in progress), failed or still pending."""
+    plan = load_plan(plan_path)
+    state_dir = plan_state_dir(plan_path)
+    status = {'plan': plan_path, 'done': [], 'claimed': [], 'failed': [], 'pending': []}
+    for shard in plan['shards']:
+        shard_id = shard['id']
+        if os.path.exists(_shard_file(state_dir, shard_id, "done")):
+            status['done'].append(shard_id)
+        elif os.path.exists(_shard_file(state_dir, shard_id, "lock")):
+            status['claimed'].append(shard_id)
+        elif os.path.exists(_shard_file(state_dir, shard_id, "failed")):
+            status['failed'].append(shard_id)
+        else:
+            status['pending'].append(shard_id)
+    status['complete'] = len(status['done']) == len(plan['shards'])
+    return status
+
+
 class FolderCreatorApp:
     def __init__(self, master):
         self.master = master
@@ -62,48 +1240,13 @@ class FolderCreatorApp:
     def _get_machine_id(self):
         """
         Generates a unique machine ID (System Code) for the machine.
-        Uses WMI for Windows for a more robust fingerprint.
-        Falls back to MAC address if WMI is not available or on non-Windows OS.
+        Uses the shared fingerprint module, so the code always matches the key generator's.
+        Falls back to the MAC address if the platform provider is unavailable.
         """
-        if platform.system() == "Windows" and wmi:
-            try:
-                c = wmi.WMI()
-
-                cpu_info = c.Win32_Processor()[0]
-                cpu_id = cpu_info.ProcessorId if hasattr(cpu_info, 'ProcessorId') else ""
-
-                board_info = c.Win32_BaseBoard()[0]
-                board_serial = board_info.SerialNumber if hasattr(board_info, 'SerialNumber') else ""
-
-                disk_serial = ""
-                disk_info = c.Win32_DiskDrive()
-                for disk in disk_info:
-                    if not disk.MediaType == "Removable Media":
-                        disk_serial = disk.SerialNumber
-                        break
-
-                mac_address = ""
-                for nic in c.Win32_NetworkAdapterConfiguration(IPEnabled=True):
-                    if nic.MACAddress:
-                        mac_address = nic.MACAddress
-                        break
-
-                raw_fingerprint_string = f"{cpu_id}-{board_serial}-{disk_serial}-{mac_address}".strip()
-                # Hash the raw fingerprint string to create the system code
-                return hashlib.sha256(raw_fingerprint_string.encode('utf-8')).hexdigest()
-
-            except Exception as e:
-                messagebox.showwarning("WMI Error", f"Could not retrieve full machine ID using WMI: {e}\nFalling back to MAC address. Ensure 'wmi' is installed (pip install wmi) and you have permissions.")
-                # Fallback to MAC address if WMI fails
-                return hex(uuid.getnode())[2:].upper()
-        else:
-            if platform.system() == "Windows" and not wmi:
-                messagebox.showwarning("WMI Module Missing", "The 'wmi' module is not installed. For a more robust machine ID, please install it using: pip install wmi\nFalling back to MAC address.")
-            elif platform.system() != "Windows":
-                messagebox.showinfo("Platform Info", "Detailed machine ID generation (WMI) is primarily supported on Windows. Using MAC address as machine ID.")
-
-            # Fallback to MAC address for non-Windows or if wmi is not installed
-            return hex(uuid.getnode())[2:].upper()
+        fingerprint = get_machine_fingerprint()
+        if fingerprint.warning:
+            messagebox.showwarning("Machine ID Warning", fingerprint.warning)
+        return fingerprint.system_code
 
     def _generate_expected_key(self, machine_id):
         """
@@ -114,7 +1257,7 @@ class FolderCreatorApp:
         if not machine_id:
             return None
         combined_string = f"{machine_id}-{AUTHORIZED_SECRET_PHRASE}"
-        return hashlib.sha256(combined_string.encode('utf-8')).hexdigest()
+        return hashlib.sha256(combined_string.encode('utf-8')).hexdigest().upper()
 
     def _load_activation_status(self):
         """
@@ -201,7 +1344,7 @@ class FolderCreatorApp:
         Validates the entered activation key against the expected key generated
         from the current machine ID. If valid, activates the application.
         """
-        entered_key = self.activation_key_var.get().strip()
+        entered_key = self.activation_key_var.get().strip().upper()
         expected_key = self._generate_expected_key(self.machine_id)
 
         if entered_key == expected_key:
@@ -237,13 +1380,21 @@ class FolderCreatorApp:
 
         # List to hold dictionaries for each book's input fields
         self.book_inputs = []
+        self._layout_suspended = False # Set while the book grid is rebuilt, to skip scroll-region updates
 
         self.is_fullscreen = tk.BooleanVar(value=True) # State for fullscreen toggle
         self.auto_pick_code = tk.BooleanVar(value=False) # Variable for auto-pick option
+        self.staged_build = tk.BooleanVar(value=False) # Build out of sight, then publish complete folders
 
         # Flag to indicate if WF_ folder creation should be skipped
         self.should_skip_wf_folder_creation = False
 
+        # Book lists remembered from past runs; recalled whenever a known code is entered or auto-extracted
+        self.book_presets = BookPresetCache()
+        self.master.after_idle(self.book_presets.preload)
+        self._applied_preset_code = None
+        self.main_folder_code.trace_add("write", self._on_main_code_changed)
+
         # --- Fullscreen Toggle ---
         fullscreen_frame = ttk.Frame(self.master, padding="5 5 5 5")
         fullscreen_frame.pack(pady=5, fill="x")
@@ -266,6 +1417,10 @@ class FolderCreatorApp:
 
         # "Browse for Location" button - now uses the specific "Browse.TButton" style
         ttk.Button(location_frame, text="Select The Main Folder", command=self.browse_location, style="Browse.TButton").pack(pady=5, fill="x")
+        # Scans a parent (intake) folder for every carton in it and builds each with its saved (or the current) book list
+        ttk.Button(location_frame, text="Scan Intake Folder for Cartons", command=self.scan_for_cartons, style="Browse.TButton").pack(pady=5, fill="x")
+        # Shows how many files each book, chapter and fixed folder of the cartons in a folder already holds
+        ttk.Button(location_frame, text="Carton Fill Status", command=self.show_fill_status, style="Browse.TButton").pack(pady=5, fill="x")
 
         # --- Checkbutton for Auto-Pick Folder Name ---
         auto_pick_frame = ttk.Frame(self.master, padding="10 0 10 0")
@@ -273,6 +1428,8 @@ class FolderCreatorApp:
         ttk.Checkbutton(auto_pick_frame, text="If you want to add some books select this option",
                         variable=self.auto_pick_code,
                         command=self._toggle_automatic_code).pack(anchor="w")
+        ttk.Checkbutton(auto_pick_frame, text="Build in a hidden staging folder and publish only when complete",
+                        variable=self.staged_build).pack(anchor="w")
 
         # --- Frame for Main Folder Code ---
         main_code_frame = ttk.Frame(self.master, padding="10 10 10 10")
@@ -295,6 +1452,8 @@ class FolderCreatorApp:
         # Bind to generate dynamic entries when number is entered or focus is lost
         self.num_sub_entry.bind("<Return>", self.generate_sub_folder_inputs)
         self.num_sub_entry.bind("<FocusOut>", self.generate_sub_folder_inputs)
+        # Fills the whole book grid from "name, chapters, format" lines on the clipboard
+        ttk.Button(num_sub_frame, text="Paste Book List", command=self.paste_book_list, style="Browse.TButton").pack(fill="x")
 
         # --- Scrollable Area for Dynamic Sub-Folder Names (Books) ---
         self.canvas = tk.Canvas(self.master, borderwidth=0, background="#f0f0f0")
@@ -320,6 +1479,8 @@ class FolderCreatorApp:
         # --- Create Folders Button ---
         self.create_button = ttk.Button(self.master, text="Create Folders", command=self.create_folders_action)
         self.create_button.pack(pady=10, fill="x", padx=10) # Make button fill width and add padding
+        # Exports the same carton as a plan file that several desks can build in parallel
+        ttk.Button(self.master, text="Export Build Plan", command=self.export_plan_action, style="Browse.TButton").pack(pady=(0, 10), fill="x", padx=10)
 
         # --- Status and Progress Bar ---
         self.status_label = ttk.Label(self.master, text="Ready", foreground="gray", font=("Inter", 9))
@@ -350,6 +1511,8 @@ class FolderCreatorApp:
 
     def on_frame_configure(self, event):
         """Update the scroll region of the canvas when the inner frame's size changes."""
+        if self._layout_suspended: # The grid is being rebuilt; it updates the scroll region once when done
+            return
         self.canvas.configure(scrollregion=self.canvas.bbox("all"))
 
     def on_canvas_configure(self, event):
@@ -369,11 +1532,7 @@ class FolderCreatorApp:
         optionally preceded by 'WF_'.
         Returns the 4-digit code as a string, or an empty string if not found.
         """
-        # Regex to match: optional "WF_", followed by exactly four digits, at the start of the string
-        match = re.match(r"^(?:WF_)?(\d{4}).*", folder_name, re.IGNORECASE)
-        if match:
-            return match.group(1) # Return the captured 4 digits
-        return ""
+        return extract_carton_code(folder_name)
 
     def browse_location(self, event=None):
         """Opens a file dialog to select the base directory and potentially auto-pick code."""
@@ -404,6 +1563,78 @@ class FolderCreatorApp:
             self.should_skip_wf_folder_creation = False
 
 
+    def show_fill_status(self):
+        """Asks for a carton (or a folder of cartons) and shows its fill status in a tree view."""
+        selected_directory = filedialog.askdirectory(title="Select a carton or a folder holding cartons")
+        if not selected_directory:
+            return
+
+        self.status_label.config(text="Scanning cartons for fill status...", foreground="blue")
+        self.master.update_idletasks()
+        try:
+            report = fill_status_paths([selected_directory])
+        except OSError as e:
+            messagebox.showerror("Scan Error", f"Could not scan '{selected_directory}': {e}")
+            self.status_label.config(text=f"Error scanning cartons: {e}", foreground="red")
+            return
+        if not report['cartons']:
+            messagebox.showinfo("No Cartons", "No folders starting with 'WF_XXXX' or 'XXXX' were found in the selected folder.")
+            self.status_label.config(text="No cartons found.", foreground="orange")
+            return
+        self.status_label.config(text=f"Fill status of {len(report['cartons'])} carton(s) ready.", foreground="gray")
+
+        status_window = tk.Toplevel(self.master)
+        status_window.title(f"Fill Status: {os.path.basename(selected_directory)}")
+        status_window.transient(self.master)
+        status_frame = ttk.Frame(status_window, padding="10 10 10 10")
+        status_frame.pack(expand=True, fill="both")
+
+        tree = ttk.Treeview(status_frame, columns=("files", "chapters", "fixed"), height=20)
+        tree.heading("#0", text="Carton / Book / Folder")
+        tree.heading("files", text="Files")
+        tree.heading("chapters", text="Chapters Filled")
+        tree.heading("fixed", text="Fixed Filled")
+        tree.column("#0", width=420)
+        for column in ("files", "chapters", "fixed"):
+            tree.column(column, width=110, anchor="center")
+        tree.pack(side="left", expand=True, fill="both")
+        tree_scrollbar = ttk.Scrollbar(status_frame, orient="vertical", command=tree.yview)
+        tree_scrollbar.pack(side="right", fill="y")
+        tree.configure(yscrollcommand=tree_scrollbar.set)
+
+        for carton in report['cartons']:
+            carton_label = os.path.basename(carton['path']) + (f"  (error: {carton['error']})" if carton['error'] else "")
+            carton_item = tree.insert("", "end", text=carton_label, values=(carton['files'], "", ""))
+            for book in carton['books']:
+                book_item = tree.insert(carton_item, "end", text=book['name'],
+                                        values=(book['files'], f"{book['chapters_filled']}/{book['chapters_total']}",
+                                                f"{book['fixed_filled']}/{book['fixed_total']}"))
+                for entry in book['fixed'] + book['chapters'] + book['other']:
+                    tree.insert(book_item, "end", text=entry['folder'], values=(entry['files'], "", ""))
+
+        button_frame = ttk.Frame(status_window, padding="10 0 10 10")
+        button_frame.pack(fill="x")
+        ttk.Button(button_frame, text="Save as CSV", style="Browse.TButton",
+                   command=lambda: self._save_fill_status(report, ".csv", status_window)).pack(side="left", expand=True, fill="x", padx=(0, 5))
+        ttk.Button(button_frame, text="Save as JSON", style="Browse.TButton",
+                   command=lambda: self._save_fill_status(report, ".json", status_window)).pack(side="left", expand=True, fill="x", padx=(0, 5))
+        ttk.Button(button_frame, text="Close", style="Browse.TButton",
+                   command=status_window.destroy).pack(side="left", expand=True, fill="x")
+
+    def _save_fill_status(self, report, extension, parent_window):
+        """Saves a fill-status report as CSV or JSON."""
+        report_path = filedialog.asksaveasfilename(title="Save fill status", parent=parent_window,
+                                                   initialfile=f"fill_status{extension}", defaultextension=extension,
+                                                   filetypes=[("CSV file", "*.csv")] if extension == ".csv" else [("JSON file", "*.json")])
+        if not report_path:
+            return
+        try:
+            write_fill_status_report(report, report_path)
+        except OSError as e:
+            messagebox.showerror("Save Error", f"Could not save fill status: {e}", parent=parent_window)
+            return
+        self.status_label.config(text=f"Fill status saved: {report_path}", foreground="green")
+
     def _toggle_automatic_code(self):
         """Enables or disables the manual code entry based on the auto-pick checkbox."""
         if self.auto_pick_code.get():
@@ -434,11 +1665,36 @@ class FolderCreatorApp:
             self.should_skip_wf_folder_creation = False
 
 
-    def generate_sub_folder_inputs(self, event=None):
+    def generate_sub_folder_inputs(self, event=None, books=None):
         """
         Dynamically creates input fields for sub-folder names (Books),
         their corresponding chapter counts, and chapter naming format.
+        If `books` is given, the rows are filled from it instead of the defaults.
         """
+        # Leaving or confirming the count field without changing it keeps what was typed or pasted
+        if event is not None and self.book_inputs and self.num_sub_folders.get().strip() == str(len(self.book_inputs)):
+            return
+
+        # Geometry and scroll-region updates are held back until every row exists
+        self._layout_suspended = True
+        self.canvas.itemconfigure(self.canvas_frame_id, state="hidden")
+        try:
+            self._build_book_rows(books)
+        finally:
+            self.canvas.itemconfigure(self.canvas_frame_id, state="normal")
+            # Geometry and <Configure> handling happen in this idle pass, so keep on_frame_configure off until it is done
+            self.canvas.update_idletasks()
+            self._layout_suspended = False
+            # Update the scroll region once, after adding all widgets
+            self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+
+        # Set focus to the first dynamically created book name entry if available
+        if self.book_inputs:
+            self.book_inputs[0]['name_entry'].focus_set()
+            self.status_label.config(text=f"Ready for {len(self.book_inputs)} book details.", foreground="gray")
+
+    def _build_book_rows(self, books=None):
+        """Creates one row of inputs per book; see generate_sub_folder_inputs."""
         # Clear existing entries
         for widget in self.dynamic_sub_folder_frame.winfo_children():
             widget.destroy()
@@ -448,12 +1704,10 @@ class FolderCreatorApp:
             num_subs = int(self.num_sub_folders.get())
             if num_subs <= 0:
                 ttk.Label(self.dynamic_sub_folder_frame, text="Enter a positive number for books.").pack()
-                self.canvas.configure(scrollregion=self.canvas.bbox("all"))
                 self.status_label.config(text="Invalid number of books.", foreground="red")
                 return
         except ValueError:
             ttk.Label(self.dynamic_sub_folder_frame, text="Invalid number. Please enter an integer.").pack()
-            self.canvas.configure(scrollregion=self.canvas.bbox("all"))
             self.status_label.config(text="Invalid number format.", foreground="red")
             return
 
@@ -501,11 +1755,13 @@ class FolderCreatorApp:
 
             self.book_inputs.append(book_data) # Store the dictionary for this book
 
-            # Set default names and chapter counts for convenience
-            if i == 0: name_var.set("Book A"); chapters_var.set("5")
-            elif i == 1: name_var.set("Book B"); chapters_var.set("3")
-            elif i == 2: name_var.set("Book C"); chapters_var.set("7")
-            else: name_var.set(f"Book {i+1}"); chapters_var.set("5")
+            # Fill from the given book list, or set default names and chapter counts for convenience
+            if books is not None and i < len(books):
+                name_var.set(books[i]['name']); chapters_var.set(str(books[i]['chapters']))
+                format_var.set(books[i]['format'] if books[i]['format'] in CHAPTER_FORMATS else "Digits")
+            else:
+                default_name, default_chapters = default_book_row(i)
+                name_var.set(default_name); chapters_var.set(str(default_chapters))
 
             # Bind Enter key for navigation/action
             name_entry.bind("<Return>", lambda e, entry=chapters_entry: entry.focus_set())
@@ -515,15 +1771,60 @@ class FolderCreatorApp:
             format_combobox.bind("<Return>", lambda e, idx=i: self._focus_next_book_input(idx))
 
 
-        # Update the scroll region after adding all widgets
-        self.canvas.update_idletasks()
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+    def _on_main_code_changed(self, *args):
+        """Recalls the saved book list when a 4-digit code with a preset is entered or auto-extracted."""
+        code = self.main_folder_code.get().strip()
+        if not (code.isdigit() and len(code) == 4):
+            self._applied_preset_code = None
+            return
+        if code == self._applied_preset_code:
+            return
+        books = self.book_presets.get(code)
+        if books:
+            self._applied_preset_code = code # Offer each code's preset once, even if declined
+            if not self._grid_holds_defaults() and not messagebox.askyesno(
+                    "Recall Book List",
+                    f"A book list with {len(books)} book(s) was saved for code {code}.\n"
+                    "Replace the books currently entered with it?"):
+                return
+            self._apply_book_list(books)
+            self.status_label.config(text=f"Recalled {len(books)} book(s) from the last run for code {code}.", foreground="green")
+
+    def _grid_holds_defaults(self):
+        """True if every book row still shows its placeholder name, chapter count and format."""
+        for i, book_data in enumerate(self.book_inputs):
+            default_name, default_chapters = default_book_row(i)
+            if (book_data['name_var'].get().strip() != default_name
+                    or book_data['chapters_var'].get().strip() != str(default_chapters)
+                    or book_data['format_var'].get() != "Digits"):
+                return False
+        return True
 
-        # Set focus to the first dynamically created book name entry if available
-        if self.book_inputs:
-            self.book_inputs[0]['name_entry'].focus_set()
-            self.status_label.config(text=f"Ready for {num_subs} book details.", foreground="gray")
+    def _apply_book_list(self, books):
+        """Rebuilds the book grid for `books` and fills in each book's name, chapter count and format."""
+        self.num_sub_folders.set(str(len(books)))
+        self.generate_sub_folder_inputs(books=books)
 
+    def paste_book_list(self):
+        """Fills the book grid from clipboard lines of "name, chapters, format" (tab-separated also works)."""
+        try:
+            clipboard_text = self.master.clipboard_get()
+        except tk.TclError:
+            messagebox.showerror("Clipboard Error", "The clipboard is empty or does not contain text.")
+            return
+        try:
+            books = parse_book_list(clipboard_text)
+        except ValueError as e:
+            messagebox.showerror("Input Error", f"Could not read the pasted book list: {e}")
+            self.status_label.config(text="Pasted book list is invalid.", foreground="red")
+            return
+        if not books:
+            messagebox.showerror("Input Error", "The clipboard does not contain any book lines.")
+            return
+
+        started = time.perf_counter()
+        self._apply_book_list(books)
+        self.status_label.config(text=f"Pasted {len(books)} book(s) in {time.perf_counter() - started:.2f} s.", foreground="green")
 
     def _focus_next_book_input(self, current_index):
         """Helper to move focus to the next book's name entry or to the final 'Create Folders' button."""
@@ -554,59 +1855,47 @@ class FolderCreatorApp:
             self.create_button.focus_set()
 
     def _number_to_word(self, num):
-        """
-        Converts a number (1-300) to its word representation.
-        Adds double space between tens and units words for numbers > 20.
-        """
-        if not isinstance(num, int) or num < 1 or num > 300:
-            return str(num) # Fallback to string for unsupported range
-
-        words_under_20 = {
-            1: "One", 2: "Two", 3: "Three", 4: "Four", 5: "Five",
-            6: "Six", 7: "Seven", 8: "Eight", 9: "Nine", 10: "Ten",
-            11: "Eleven", 12: "Twelve", 13: "Thirteen", 14: "Fourteen", 15: "Fifteen",
-            16: "Sixteen", 17: "Seventeen", 18: "Eighteen", 19: "Nineteen"
-        }
-
-        tens_words = {
-            20: "Twenty", 30: "Thirty", 40: "Forty", 50: "Fifty",
-            60: "Sixty", 70: "Seventy", 80: "Eighty", 90: "Ninety"
-        }
-
-        if num < 20:
-            return words_under_20[num]
-        elif num < 100:
-            tens = (num // 10) * 10
-            units = num % 10
-            if units == 0:
-                return tens_words[tens]
-            else:
-                # Apply double space for numbers after 20 (e.g., 21, 35)
-                return f"{tens_words[tens]}  {words_under_20[units]}"
-        elif num < 301:
-            hundreds = num // 100
-            remainder = num % 100
-
-            hundreds_word = ""
-            if hundreds == 1:
-                hundreds_word = "One Hundred"
-            elif hundreds == 2:
-                hundreds_word = "Two Hundred"
-            elif hundreds == 3:
-                hundreds_word = "Three Hundred"
-
-            if remainder == 0:
-                return hundreds_word
-            else:
-                # The recursive call self._number_to_word(remainder) will apply the double space
-                # if 'remainder' is between 21-99.
-                return f"{hundreds_word} and {self._number_to_word(remainder)}"
-        else:
-            return str(num)
+        """Converts a number (1-300) to its word representation. See `number_to_word`."""
+        return number_to_word(num)
 
 
     def create_folders_action(self):
         """Validates inputs and triggers the folder creation."""
+        base_directory, main_code = self._get_location_and_code()
+        if not main_code:
+            return
+
+        book_data_for_creation = self._collect_book_data()
+        if book_data_for_creation is None:
+            return
+
+        skip_wf_folder_creation_for_this_run = self.should_skip_wf_folder_creation
+
+        self.create_button.config(state=tk.DISABLED)
+        self.progress_bar.start()
+        self.status_label.config(text="Creating folders...", foreground="blue")
+        self.master.update_idletasks()
+
+        try:
+            # --- DEBUG PRINT ---
+            print(f"DEBUG: book_data_for_creation before calling _create_nested_folders_logic: {book_data_for_creation}")
+            self._create_nested_folders_logic(base_directory, main_code, book_data_for_creation,
+                                              skip_wf_folder_creation_for_this_run, staged=self.staged_build.get())
+            self.book_presets.put(main_code, book_data_for_creation)
+            messagebox.showinfo("Success", "Folders created successfully!")
+            self.status_label.config(text="Folders created successfully!", foreground="green")
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred: {e}")
+            self.status_label.config(text=f"Error: {e}", foreground="red")
+        finally:
+            self.create_button.config(state=tk.NORMAL)
+            self.progress_bar.stop()
+
+    def _get_location_and_code(self):
+        """
+        Validates the selected directory and the 4-digit code.
+        Returns (base_directory, main_code), or (None, None) after showing an error.
+        """
         base_directory = self.output_location.get()
         main_code = self.main_folder_code.get()
 
@@ -614,28 +1903,65 @@ class FolderCreatorApp:
         if not base_directory or base_directory == "No directory selected.":
             messagebox.showerror("Input Error", "Please select a base directory.")
             self.status_label.config(text="Please select a base directory.", foreground="red")
-            return
+            return None, None
 
         if not main_code:
             messagebox.showerror("Input Error", "Please enter the 4-digit code or ensure it was auto-extracted successfully from the selected directory.")
             self.status_label.config(text="4-digit code is missing.", foreground="red")
-            return
+            return None, None
 
         if not main_code.isdigit() or len(main_code) != 4:
             messagebox.showerror("Input Error", "The main folder code must be exactly 4 digits. Please correct it, or if auto-extracting, ensure the selected directory name starts with 'WF_XXXX' or 'XXXX'.")
             self.status_label.config(text="Invalid 4-digit code format.", foreground="red")
+            return None, None
+
+        return base_directory, main_code
+
+    def export_plan_action(self):
+        """
+        Saves the current carton as a shardable plan file instead of building it, so several
+        desks can build it together with `indexingpro.py --run-plan PLAN`.
+        """
+        base_directory, main_code = self._get_location_and_code()
+        if not main_code:
+            return
+        book_data_for_export = self._collect_book_data()
+        if book_data_for_export is None:
+            return
+
+        plan_path = filedialog.asksaveasfilename(title="Save build plan", initialdir=base_directory,
+                                                 initialfile=f"WF_{main_code}_plan.json", defaultextension=".json",
+                                                 filetypes=[("Build plan", "*.json")])
+        if not plan_path:
             return
 
+        carton = plan_carton(base_directory, main_code, book_data_for_export, self.should_skip_wf_folder_creation)
+        plan = build_plan([carton])
+        try:
+            save_plan(plan, plan_path)
+        except OSError as e:
+            messagebox.showerror("Save Error", f"Could not save build plan: {e}")
+            self.status_label.config(text=f"Error saving plan: {e}", foreground="red")
+            return
+        messagebox.showinfo("Plan Saved", f"Build plan saved with {len(plan['shards'])} shard(s).\n"
+                                          f"Run 'indexingpro.py --run-plan \"{plan_path}\"' on each desk to build it.")
+        self.status_label.config(text=f"Build plan saved: {plan_path}", foreground="green")
+
+    def _collect_book_data(self):
+        """
+        Validates the book grid and returns a list of {'name', 'chapters', 'format'} dicts.
+        Shows an error and returns None if any entry is invalid or the user cancels.
+        """
         try:
             num_books_expected = int(self.num_sub_folders.get())
             if num_books_expected <= 0:
                 messagebox.showerror("Input Error", "Number of books must be a positive integer.")
                 self.status_label.config(text="Number of books must be positive.", foreground="red")
-                return
+                return None
         except ValueError:
             messagebox.showerror("Input Error", "Number of books must be a valid integer.")
             self.status_label.config(text="Invalid number of books.", foreground="red")
-            return
+            return None
 
         # Collect and validate book names and chapter counts and formats
         book_data_for_creation = []
@@ -647,21 +1973,21 @@ class FolderCreatorApp:
             if not book_name:
                 messagebox.showerror("Input Error", f"Please enter a name for Book {i+1}.")
                 self.status_label.config(text=f"Book {i+1} name is missing.", foreground="red")
-                return
+                return None
 
             try:
                 num_chapters_val = int(chapter_count_str)
                 if num_chapters_val <= 0:
                     messagebox.showerror("Input Error", f"Number of chapters for Book '{book_name}' must be a positive integer.")
                     self.status_label.config(text=f"Invalid chapters for Book '{book_name}'.", foreground="red")
-                    return
+                    return None
 
                 # Warn if using words for numbers outside the supported range (1-300) AND if Words format is chosen
                 if chapter_format_selected == "Words" and (num_chapters_val < 1 or num_chapters_val > 300):
                     response = messagebox.askyesno("Warning", f"Using 'Words' format for chapter numbers for '{book_name}' (count: {num_chapters_val}) might result in digits for higher numbers. Do you want to continue?")
                     if not response:
                         self.status_label.config(text="Chapter creation cancelled.", foreground="orange")
-                        return
+                        return None
 
                 book_data_for_creation.append({
                     'name': book_name,
@@ -672,39 +1998,142 @@ class FolderCreatorApp:
             except ValueError:
                 messagebox.showerror("Input Error", f"Number of chapters for Book '{book_name}' must be a valid integer.")
                 self.status_label.config(text=f"Invalid chapter format for Book '{book_name}'.", foreground="red")
-                return
+                return None
 
         if len(book_data_for_creation) != num_books_expected:
             messagebox.showerror("Input Error", f"Mismatch: Expected {num_books_expected} books, but found {len(book_data_for_creation)} valid entries. Please ensure all book names and chapter counts are filled correctly.")
             self.status_label.config(text="Mismatch in book/chapter counts.", foreground="red")
+            return None
+
+        return book_data_for_creation
+
+    def scan_for_cartons(self):
+        """Asks for an intake folder, scans it once for carton directories and lists them for queued building."""
+        parent_directory = filedialog.askdirectory(title="Select the intake folder that holds the cartons")
+        if not parent_directory:
             return
 
-        skip_wf_folder_creation_for_this_run = self.should_skip_wf_folder_creation
+        try:
+            cartons = scan_parent_for_cartons(parent_directory)
+        except OSError as e:
+            messagebox.showerror("Scan Error", f"Could not scan '{parent_directory}': {e}")
+            self.status_label.config(text=f"Error scanning intake folder: {e}", foreground="red")
+            return
+
+        if not cartons:
+            messagebox.showinfo("No Cartons", "No folders starting with 'WF_XXXX' or 'XXXX' were found in the selected folder.")
+            self.status_label.config(text="No cartons found in intake folder.", foreground="orange")
+            return
+
+        self.status_label.config(text=f"Found {len(cartons)} carton(s) in '{os.path.basename(parent_directory)}'.", foreground="gray")
+        self._show_carton_queue(parent_directory, cartons)
+
+    def _show_carton_queue(self, parent_directory, cartons):
+        """Shows the scanned cartons in a window where the operator picks which ones to build."""
+        queue_window = tk.Toplevel(self.master)
+        queue_window.title(f"Cartons in {os.path.basename(parent_directory)}")
+        queue_window.transient(self.master)
+
+        queue_frame = ttk.Frame(queue_window, padding="10 10 10 10")
+        queue_frame.pack(expand=True, fill="both")
+        ttk.Label(queue_frame, text="Select the cartons to build. Each carton uses the book list saved for its code; "
+                                    "cartons without one use the current book list (cartons that already have book folders are not pre-selected):",
+                  wraplength=500).pack(anchor="w", pady=(0, 5))
+
+        tree = ttk.Treeview(queue_frame, columns=("code", "books", "list"), selectmode="extended", height=15)
+        tree.heading("#0", text="Carton Folder")
+        tree.heading("code", text="Code")
+        tree.heading("books", text="Has Book Folders")
+        tree.heading("list", text="Book List")
+        tree.column("code", width=80, anchor="center")
+        tree.column("books", width=120, anchor="center")
+        tree.column("list", width=140, anchor="center")
+        tree.pack(side="left", expand=True, fill="both")
+        tree_scrollbar = ttk.Scrollbar(queue_frame, orient="vertical", command=tree.yview)
+        tree_scrollbar.pack(side="right", fill="y")
+        tree.configure(yscrollcommand=tree_scrollbar.set)
+
+        cartons_by_item = {}
+        for carton in cartons:
+            preset = self.book_presets.get(carton['code'], touch=False)
+            book_list = f"Saved ({len(preset)} books)" if preset else "Current list"
+            item_id = tree.insert("", "end", text=carton['name'],
+                                  values=(carton['code'], "Yes" if carton['has_books'] else "No", book_list))
+            cartons_by_item[item_id] = carton
+        tree.selection_set([item_id for item_id, carton in cartons_by_item.items() if not carton['has_books']])
+
+        button_frame = ttk.Frame(queue_window, padding="10 0 10 10")
+        button_frame.pack(fill="x")
+        ttk.Button(button_frame, text="Build Selected", style="Browse.TButton",
+                   command=lambda: self._build_carton_queue(queue_window, [cartons_by_item[item] for item in tree.selection()])).pack(side="left", expand=True, fill="x", padx=(0, 5))
+        ttk.Button(button_frame, text="Close", style="Browse.TButton",
+                   command=queue_window.destroy).pack(side="left", expand=True, fill="x")
+
+    def _build_carton_queue(self, queue_window, cartons):
+        """
+        Builds each queued carton with its own code and the book list saved for that code,
+        falling back to the current book grid for cartons without a saved preset.
+        """
+        if not cartons:
+            messagebox.showerror("Input Error", "Please select at least one carton to build.", parent=queue_window)
+            return
+
+        books_by_code = {carton['code']: self.book_presets.get(carton['code']) for carton in cartons}
+        grid_books = None
+        if not all(books_by_code.values()):
+            grid_books = self._collect_book_data()
+            if grid_books is None:
+                return
+            # Different cartons usually hold different books, so confirm before stamping one list into several
+            grid_cartons = [carton['name'] for carton in cartons if not books_by_code[carton['code']]]
+            if len(grid_cartons) > 1:
+                listed_books = "\n".join(f"  {book['name']}: {book['chapters']} chapters ({book['format']})"
+                                         for book in grid_books[:15])
+                if len(grid_books) > 15:
+                    listed_books += f"\n  ... and {len(grid_books) - 15} more"
+                if not messagebox.askyesno("Confirm Book List",
+                                           f"{len(grid_cartons)} carton(s) have no saved book list and will all get the current one:\n"
+                                           f"{listed_books}\n\nBuild this same list into {', '.join(grid_cartons[:5])}"
+                                           f"{' ...' if len(grid_cartons) > 5 else ''}?", parent=queue_window):
+                    self.status_label.config(text="Queued build cancelled.", foreground="orange")
+                    return
+        queue_window.destroy()
 
         self.create_button.config(state=tk.DISABLED)
         self.progress_bar.start()
-        self.status_label.config(text="Creating folders...", foreground="blue")
-        self.master.update_idletasks()
-
+        failed = []
         try:
-            # --- DEBUG PRINT ---
-            print(f"DEBUG: book_data_for_creation before calling _create_nested_folders_logic: {book_data_for_creation}")
-            self._create_nested_folders_logic(base_directory, main_code, book_data_for_creation,
-                                              skip_wf_folder_creation_for_this_run)
-            messagebox.showinfo("Success", "Folders created successfully!")
-            self.status_label.config(text="Folders created successfully!", foreground="green")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {e}")
-            self.status_label.config(text=f"Error: {e}", foreground="red")
+            for index, carton in enumerate(cartons, start=1):
+                self.status_label.config(text=f"Building carton {index}/{len(cartons)}: {carton['name']}...", foreground="blue")
+                self.master.update_idletasks()
+                book_data_for_creation = books_by_code[carton['code']] or grid_books
+                try:
+                    # The carton directory already exists, so books go straight into it
+                    self._create_nested_folders_logic(carton['path'], carton['code'], book_data_for_creation,
+                                                      skip_wf_folder=True, staged=self.staged_build.get())
+                    self.book_presets.put(carton['code'], book_data_for_creation)
+                except Exception as e:
+                    failed.append(f"{carton['name']}: {e}")
         finally:
             self.create_button.config(state=tk.NORMAL)
             self.progress_bar.stop()
 
+        if failed:
+            messagebox.showerror("Error", f"{len(failed)} of {len(cartons)} carton(s) failed:\n" + "\n".join(failed))
+            self.status_label.config(text=f"Built {len(cartons) - len(failed)}/{len(cartons)} cartons; {len(failed)} failed.", foreground="red")
+        else:
+            messagebox.showinfo("Success", f"Folders created in {len(cartons)} carton(s)!")
+            self.status_label.config(text=f"Built {len(cartons)} carton(s) successfully!", foreground="green")
+
     def _create_nested_folders_logic(self, base_directory, main_folder_code, book_data,
-                                      skip_wf_folder=False):
+                                      skip_wf_folder=False, use_dir_fd=True, staged=False):
         # --- DEBUG PRINT ---
         print(f"DEBUG: _create_nested_folders_logic received book_data: {book_data}")
 
+        if staged:
+            self._create_staged_folders(base_directory, main_folder_code, book_data, skip_wf_folder, use_dir_fd)
+            return
+
         """
         Core logic to create the nested folder structure.
         WF_[MainFolderName]
@@ -715,12 +2144,11 @@ class FolderCreatorApp:
             ├── WF_[Main 4-digit Code]_[Book Name]_Chapter Null (1)_Null Name_ OR WF_[Main 4-digit Code]_[Book Name]_Chapter One_Null Name_
             ├── WF_[Main 4-digit Code]_[Book Name]_Chapter Null (2)_Null Name_ OR WF_[Main 4-digit Code]_[Book Name]_Chapter Two_Null Name_
             ...
+        With `use_dir_fd`, each book folder is opened once and its children are created relative
+        to that handle where the platform supports it (see DirectoryHandle).
+        With `staged`, the structure is built out of sight first (see _create_staged_folders).
         """
-        fixed_sub_sub_folders = [
-            "Cover", "Front Index", "Acknowledgements", "Note About On The Author",
-            "Author's Note", "Prologue", "Epilogue", "Back Index", "About The Author",
-            "Prelude", "Preface", "Index", "Bibliography", "Appendix", "Notes"
-        ]
+        fixed_sub_sub_folders = FIXED_SUB_SUB_FOLDERS
 
         self.status_label.config(text="Ensuring base directory exists...", foreground="blue")
         self.master.update_idletasks()
@@ -744,62 +2172,176 @@ class FolderCreatorApp:
             print(f"Created main WF_ folder: {wf_folder_path}")
 
         # Create sub-folders (Books) directly inside the determined wf_folder_path
-        for i, book_info in enumerate(book_data):
-            sub_name_raw = book_info['name']
-            num_chapters_for_this_book = book_info['chapters']
-            chapter_format_for_this_book = book_info['format'] # Get the format for this specific book
+        with DirectoryHandle(wf_folder_path, use_dir_fd, scheduler=get_io_scheduler(),
+                             priority=PRIORITY_INTERACTIVE) as wf_handle:
+            for i, book_info in enumerate(book_data):
+                sub_name_raw = book_info['name']
+                num_chapters_for_this_book = book_info['chapters']
+                chapter_format_for_this_book = book_info['format'] # Get the format for this specific book
 
-            sub_name_final = f"WF_{main_folder_code}_{sub_name_raw}"
+                sub_name_final = book_folder_name(main_folder_code, sub_name_raw)
 
-            self.status_label.config(text=f"Creating book folder {i+1}/{len(book_data)}: {sub_name_final}...", foreground="blue")
-            self.master.update_idletasks()
-
-            sub_folder_path = os.path.join(wf_folder_path, sub_name_final)
-            os.makedirs(sub_folder_path, exist_ok=True)
-            print(f"  Created book folder: {sub_folder_path}")
-
-            # --- Create fixed sub-sub-folders inside each book's folder ---
-            for j, fixed_name_raw in enumerate(fixed_sub_sub_folders):
-                fixed_folder_name_final = f"WF_{main_folder_code}_{sub_name_raw}_{fixed_name_raw}"
-                self.status_label.config(text=f"    Creating fixed folder {j+1}/{len(fixed_sub_sub_folders)} in '{sub_name_final}': {fixed_folder_name_final}...", foreground="darkgreen")
+                self.status_label.config(text=f"Creating book folder {i+1}/{len(book_data)}: {sub_name_final}...", foreground="blue")
                 self.master.update_idletasks()
 
-                fixed_folder_path = os.path.join(sub_folder_path, fixed_folder_name_final)
-                os.makedirs(fixed_folder_path, exist_ok=True)
-                print(f"    Created fixed sub-sub-folder: {fixed_folder_path}")
-            print(f"  Finished fixed folders for '{sub_name_final}'")
-            # --- End fixed sub-sub-folder creation ---
-
-            # --- Create Chapter folders at the same level as fixed folders ---
-            for k in range(1, num_chapters_for_this_book + 1):
-                chapter_folder_name_final = ""
-                status_text_chapter_progress = ""
-                null_name_suffix = "_Null Name" # Define the suffix once
-
-                if chapter_format_for_this_book == "Null":
-                    chapter_folder_name_final = f"WF_{main_folder_code}_{sub_name_raw}_Chapter Null ({k}){null_name_suffix}"
-                    status_text_chapter_progress = f"    Creating Chapter Null folder {k}/{num_chapters_for_this_book} in '{sub_name_final}': {chapter_folder_name_final}..."
-                elif chapter_format_for_this_book == "Words":
-                    chapter_num_str = self._number_to_word(k)
-                    chapter_folder_name_final = f"WF_{main_folder_code}_{sub_name_raw}_Chapter {chapter_num_str}{null_name_suffix}"
-                    status_text_chapter_progress = f"    Creating Chapter Word folder {k}/{num_chapters_for_this_book} in '{sub_name_final}': {chapter_folder_name_final}..."
-                else: # "Digits" (default)
-                    chapter_num_str = str(k)
-                    chapter_folder_name_final = f"WF_{main_folder_code}_{sub_name_raw}_Chapter {chapter_num_str}{null_name_suffix}"
-                    status_text_chapter_progress = f"    Creating Chapter Digit folder {k}/{num_chapters_for_this_book} in '{sub_name_final}': {chapter_folder_name_final}..."
-
-                self.status_label.config(text=status_text_chapter_progress, foreground="darkblue")
-                self.master.update_idletasks()
-                chapter_folder_path = os.path.join(sub_folder_path, chapter_folder_name_final)
-                os.makedirs(chapter_folder_path, exist_ok=True)
-                print(f"    Created chapter folder: {chapter_folder_path}")
-            print(f"  Finished chapters for '{sub_name_final}'")
-            # --- End Chapter folder creation ---
+                with wf_handle.child(sub_name_final) as book_handle:
+                    sub_folder_path = book_handle.path
+                    print(f"  Created book folder: {sub_folder_path}")
+
+                    # --- Create fixed sub-sub-folders inside each book's folder ---
+                    for j, fixed_name_raw in enumerate(fixed_sub_sub_folders):
+                        fixed_folder_name_final = fixed_folder_name(main_folder_code, sub_name_raw, fixed_name_raw)
+                        self.status_label.config(text=f"    Creating fixed folder {j+1}/{len(fixed_sub_sub_folders)} in '{sub_name_final}': {fixed_folder_name_final}...", foreground="darkgreen")
+                        self.master.update_idletasks()
+
+                        fixed_folder_path = book_handle.mkdir(fixed_folder_name_final)
+                        print(f"    Created fixed sub-sub-folder: {fixed_folder_path}")
+                    print(f"  Finished fixed folders for '{sub_name_final}'")
+                    # --- End fixed sub-sub-folder creation ---
+
+                    # --- Create Chapter folders at the same level as fixed folders ---
+                    for k in range(1, num_chapters_for_this_book + 1):
+                        chapter_folder_name_final = chapter_folder_name(main_folder_code, sub_name_raw, k, chapter_format_for_this_book)
+                        format_label = {"Null": "Null", "Words": "Word"}.get(chapter_format_for_this_book, "Digit")
+                        status_text_chapter_progress = f"    Creating Chapter {format_label} folder {k}/{num_chapters_for_this_book} in '{sub_name_final}': {chapter_folder_name_final}..."
+
+                        self.status_label.config(text=status_text_chapter_progress, foreground="darkblue")
+                        self.master.update_idletasks()
+                        chapter_folder_path = book_handle.mkdir(chapter_folder_name_final)
+                        print(f"    Created chapter folder: {chapter_folder_path}")
+                    print(f"  Finished chapters for '{sub_name_final}'")
+                    # --- End Chapter folder creation ---
         print("-" * 30)
         print("\nFolder creation process completed.")
 
+    def _create_staged_folders(self, base_directory, main_folder_code, book_data, skip_wf_folder, use_dir_fd):
+        """
+        Builds the structure in a hidden staging folder on the same filesystem, then publishes it:
+        the whole WF_ carton with one rename, or, when books go into an existing carton, each book
+        folder with its own rename. Colleagues therefore never see a half-made carton, and a failed
+        build is cleaned up by removing the staging folder.
+        """
+        os.makedirs(base_directory, exist_ok=True)
+        wf_folder_path = base_directory if skip_wf_folder else os.path.join(base_directory, f"WF_{main_folder_code}")
+        publish_whole_carton = not os.path.exists(wf_folder_path)
+
+        staging_path = make_staging_directory(base_directory)
+        print(f"Staging build in: {staging_path}")
+        try:
+            # A new carton is staged as WF_XXXX; books for an existing carton are staged on their own
+            self._create_nested_folders_logic(staging_path, main_folder_code, book_data,
+                                              skip_wf_folder=not publish_whole_carton, use_dir_fd=use_dir_fd)
+
+            self.status_label.config(text="Publishing finished folders...", foreground="blue")
+            self.master.update_idletasks()
+            if publish_whole_carton:
+                publish_staged_folder(os.path.join(staging_path, f"WF_{main_folder_code}"), wf_folder_path)
+                print(f"Published carton: {wf_folder_path}")
+            else:
+                for book_info in book_data:
+                    sub_name_final = book_folder_name(main_folder_code, book_info['name'])
+                    publish_staged_folder(os.path.join(staging_path, sub_name_final),
+                                          os.path.join(wf_folder_path, sub_name_final))
+                    print(f"  Published book folder: {os.path.join(wf_folder_path, sub_name_final)}")
+        finally:
+            shutil.rmtree(staging_path, ignore_errors=True)
+
+    def _profile_output_dir(self):
+        """Directory the profile files are written to: the selected output directory, else the working directory."""
+        location = self.output_location.get() if hasattr(self, 'output_location') else ""
+        if location and location != "No directory selected." and os.path.isdir(location):
+            return location
+        return os.getcwd()
+
 # --- Run the App ---
-if __name__ == "__main__":
+def _write_json_report(report, report_file=None):
+    """Writes a JSON report to `report_file`, or to stdout if none is given."""
+    if report_file:
+        with open(report_file, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {report_file}")
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Indexing PRO folder creator")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"Profile startup and folder creation (also enabled by {PROFILE_ENV_VAR}=1)")
+    parser.add_argument("--audit", nargs="+", metavar="PATH",
+                        help="Audit cartons (or shares holding cartons) against the expected layout and exit")
+    parser.add_argument("--books", metavar="FILE",
+                        help="With --audit, the expected book list as 'name, chapters, format' lines")
+    parser.add_argument("--plan", nargs="+", metavar="PLAN",
+                        help="With --audit, take each carton's expected book list from these plan files")
+    parser.add_argument("--report-file", metavar="FILE",
+                        help="Write the JSON report here instead of printing it")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of cartons scanned in parallel")
+    parser.add_argument("--fill-report", nargs="+", metavar="PATH",
+                        help="Count files per book, chapter and fixed folder of cartons (or shares) and exit; "
+                             "--report-file ending in .csv writes CSV, otherwise JSON")
+    parser.add_argument("--run-plan", metavar="PLAN",
+                        help="Claim and build shards of an exported plan file, then exit")
+    parser.add_argument("--plan-status", metavar="PLAN",
+                        help="Show which shards of a plan file are done, claimed, failed or pending")
+    parser.add_argument("--stale-after", type=float, default=None, metavar="SECONDS",
+                        help="With --run-plan, take over shard locks older than this (crashed workers)")
+    parser.add_argument("--io-ops-per-second", type=int, default=None, metavar="N",
+                        help=f"Ceiling on folder operations per second, 0 for none (default {IO_MAX_OPS_PER_SECOND}, or {IO_OPS_ENV_VAR})")
+    args = parser.parse_args(argv)
+
+    if args.io_ops_per_second is not None:
+        configure_io_scheduler(args.io_ops_per_second)
+
+    if args.fill_report:
+        report = fill_status_paths(args.fill_report, max_workers=args.workers)
+        if args.report_file:
+            write_fill_status_report(report, args.report_file)
+            print(f"Report written to {args.report_file}")
+        else:
+            _write_json_report(report)
+        return 0
+    if args.run_plan:
+        result = run_plan_worker(args.run_plan, stale_after=args.stale_after)
+        _write_json_report(result, args.report_file)
+        return 0 if not result['failed'] else 1
+    if args.plan_status:
+        status = plan_status(args.plan_status)
+        _write_json_report(status, args.report_file)
+        return 0 if status['complete'] else 1
+
+    if args.audit:
+        book_data = None
+        if args.books:
+            with open(args.books, 'r') as f:
+                book_data = parse_book_list(f.read())
+        report = audit_paths(args.audit, book_data=book_data, max_workers=args.workers,
+                             plan_paths=args.plan or (), presets=BookPresetCache())
+        _write_json_report(report, args.report_file)
+        if not report['ok']:
+            return 1
+        return 2 if report['unverified'] else 0
+
+    profiler = None
+    if profiling_requested(args.profile):
+        profiler = RunProfiler()
+        profiler.instrument(FolderCreatorApp)
+
     root = tk.Tk()
-    app = FolderCreatorApp(root)
-    root.mainloop()
+    if profiler:
+        with profiler:
+            app = FolderCreatorApp(root)
+    else:
+        app = FolderCreatorApp(root)
+
+    try:
+        root.mainloop()
+    finally:
+        if profiler:
+            stats_path, summary_path = profiler.dump(app._profile_output_dir())
+            print(f"Profile written to {stats_path} (summary: {summary_path})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 import hashlib
-import platform
 import sys
 from tkinter import messagebox # Using tkinter messagebox for consistency
+from fingerprint import get_machine_fingerprint # Shared with indexingpro.py
 
 # --- IMPORTANT: Secret Phrase for Activation Key Generation ---
 # This MUST be IDENTICAL to the one in your Client Application (Indexing PRO).
@@ -10,49 +10,17 @@ AUTHORIZED_SECRET_PHRASE = "MyCustomSecretPhraseForRenamerApp2025!"
 
 def get_machine_fingerprint_for_key_gen():
     """
-    Generates a unique fingerprint (System Code) for the machine (Windows-specific).
-    This function is a copy of the one in the main app to ensure consistency.
+    Generates a unique fingerprint (System Code) for this machine.
+    Uses the same shared fingerprint module as the main app, so both produce identical codes.
     """
-    if platform.system() != "Windows":
-        messagebox.showerror("Platform Error", "This key generator is currently supported only on Windows.")
-        return None
-
     try:
-        import wmi 
-        c = wmi.WMI()
-
-        cpu_info = c.Win32_Processor()[0]
-        cpu_id = cpu_info.ProcessorId if hasattr(cpu_info, 'ProcessorId') else ""
-
-        board_info = c.Win32_BaseBoard()[0]
-        board_serial = board_info.SerialNumber if hasattr(board_info, 'SerialNumber') else ""
-
-        disk_serial = ""
-        disk_info = c.Win32_DiskDrive()
-        for disk in disk_info:
-            if not disk.MediaType == "Removable Media" and disk.SerialNumber:
-                disk_serial = disk.SerialNumber.strip()
-                break
-        
-        # Fallback for disk serial if not found or if only removable media
-        if not disk_serial and disk_info:
-             disk_serial = disk_info[0].SerialNumber.strip() if hasattr(disk_info[0], 'SerialNumber') else ""
-
-        mac_address = ""
-        for nic in c.Win32_NetworkAdapterConfiguration(IPEnabled=True):
-            if nic.MACAddress:
-                mac_address = nic.MACAddress.replace(":", "").upper() # Clean MAC format
-                break
-
-        raw_fingerprint_string = f"{cpu_id}-{board_serial}-{disk_serial}-{mac_address}".strip()
-        return hashlib.sha256(raw_fingerprint_string.encode('utf-8')).hexdigest().upper()
-
-    except ImportError:
-        messagebox.showerror("Dependency Error", "The 'wmi' module is required. Please install it using: pip install wmi")
-        return None
+        fingerprint = get_machine_fingerprint()
     except Exception as e:
         messagebox.showerror("System Error", f"Could not generate machine ID: {e}\nEnsure you have necessary permissions.")
         return None
+    if fingerprint.warning:
+        messagebox.showwarning("Machine ID Warning", fingerprint.warning)
+    return fingerprint.system_code
 
 def generate_activation_key(system_code, secret_phrase):
     """
@@ -0,0 +1,100 @@
+import hashlib
+import os
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+import fingerprint
+import indexingpro
+import keyindex
+
+
+class StubProvider:
+    """Provider returning fixed components, standing in for WMI/sysfs."""
+    name = "stub"
+
+    def components(self):
+        return ["CPU123", " BOARD-9 ", "DISK 42", "aa:bb:cc:dd:ee:ff"]
+
+
+class NormalizeMacTests(unittest.TestCase):
+    def test_strips_separators_and_uppercases(self):
+        self.assertEqual(fingerprint.normalize_mac("aa:bb:cc:dd:ee:ff"), "AABBCCDDEEFF")
+        self.assertEqual(fingerprint.normalize_mac("AA-BB-CC-DD-EE-FF"), "AABBCCDDEEFF")
+        self.assertEqual(fingerprint.normalize_mac("aabb.ccdd.eeff"), "AABBCCDDEEFF")
+
+    def test_empty_values(self):
+        self.assertEqual(fingerprint.normalize_mac(""), "")
+        self.assertEqual(fingerprint.normalize_mac(None), "")
+
+
+class FingerprintFromComponentsTests(unittest.TestCase):
+    def test_fixed_digest(self):
+        self.assertEqual(fingerprint.fingerprint_from_components(["CPU", "BOARD", "DISK", "AABBCCDDEEFF"]),
+                         "18B5156CDC3D09D4381B8A1725B976F2EDBAE8E3D4C3686DE9256535BE4454C5")
+
+    def test_components_are_stripped(self):
+        self.assertEqual(fingerprint.fingerprint_from_components([" CPU ", None, "DISK", ""]),
+                         hashlib.sha256(b"CPU--DISK-").hexdigest().upper())
+
+
+class LinuxSysfsProviderTests(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.dmi_dir = os.path.join(self.root.name, "dmi", "id")
+        self.net_dir = os.path.join(self.root.name, "net")
+        os.makedirs(self.dmi_dir)
+        os.makedirs(self.net_dir)
+
+    def tearDown(self):
+        self.root.cleanup()
+
+    def _write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text + "\n")
+
+    def _add_interface(self, name, mac, physical):
+        self._write(os.path.join(self.net_dir, name, "address"), mac)
+        if physical:
+            os.makedirs(os.path.join(self.net_dir, name, "device"))
+
+    def test_reads_dmi_and_prefers_physical_interface(self):
+        self._write(os.path.join(self.dmi_dir, "product_uuid"), "abcd-1234")
+        self._write(os.path.join(self.dmi_dir, "board_serial"), "BOARD1")
+        self._write(os.path.join(self.dmi_dir, "product_serial"), "PROD1")
+        self._add_interface("lo", "00:00:00:00:00:00", physical=False)
+        self._add_interface("docker0", "02:42:ac:11:00:01", physical=False)
+        self._add_interface("eth0", "00:00:00:00:00:00", physical=True)
+        self._add_interface("eth1", "aa:bb:cc:dd:ee:01", physical=True)
+
+        provider = fingerprint.LinuxSysfsProvider(self.dmi_dir, self.net_dir)
+        self.assertEqual(provider.components(), ["ABCD-1234", "BOARD1", "PROD1", "AABBCCDDEE01"])
+
+    def test_falls_back_to_virtual_interface_and_skips_loopback(self):
+        self._add_interface("lo", "11:22:33:44:55:66", physical=False)
+        self._add_interface("br0", "02:00:00:00:00:07", physical=False)
+
+        provider = fingerprint.LinuxSysfsProvider(self.dmi_dir, self.net_dir)
+        self.assertEqual(provider.components(), ["", "", "", "020000000007"])
+
+    def test_no_identifiers_raises(self):
+        provider = fingerprint.LinuxSysfsProvider(self.dmi_dir, self.net_dir)
+        with self.assertRaises(OSError):
+            provider.components()
+
+
+class CallersAgreeTests(unittest.TestCase):
+    def test_app_and_key_generator_return_identical_codes(self):
+        with mock.patch.object(fingerprint, "select_provider", return_value=StubProvider()):
+            app_code = indexingpro.FolderCreatorApp._get_machine_id(types.SimpleNamespace())
+            key_gen_code = keyindex.get_machine_fingerprint_for_key_gen()
+
+        self.assertEqual(app_code, key_gen_code)
+        self.assertEqual(app_code.encode('utf-8'), key_gen_code.encode('utf-8'))
+        self.assertEqual(app_code, fingerprint.fingerprint_from_components(StubProvider().components()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import indexingpro
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "indexingpro.py")
+
+
+class RunPlanTests(unittest.TestCase):
+    """Runs `--run-plan` workers as separate processes against one plan in a temp directory."""
+
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.books = [{'name': f"Book {i}", 'chapters': 4, 'format': ("Digits", "Words", "Null")[i % 3]}
+                      for i in range(16)]
+        carton = indexingpro.plan_carton(self.root.name, "4321", self.books)
+        self.plan = indexingpro.build_plan([carton], books_per_shard=2)
+        self.plan_path = os.path.join(self.root.name, "plan.json")
+        indexingpro.save_plan(self.plan, self.plan_path)
+        self.state_dir = indexingpro.plan_state_dir(self.plan_path)
+        self.carton_path = os.path.join(self.root.name, "WF_4321")
+
+    def tearDown(self):
+        self.root.cleanup()
+
+    def _start_worker(self, *extra_args):
+        return subprocess.Popen([sys.executable, SCRIPT, "--run-plan", self.plan_path,
+                                 "--io-ops-per-second", "0", *extra_args],
+                                cwd=self.root.name, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+    def _finish(self, process):
+        stdout, stderr = process.communicate(timeout=120)
+        self.assertIn(process.returncode, (0, 1), stderr)
+        return process.returncode, json.loads(stdout)
+
+    def _run_worker(self, *extra_args):
+        return self._finish(self._start_worker(*extra_args))
+
+    def _write_lock(self, shard_id, worker, age):
+        lock_path = os.path.join(self.state_dir, f"shard-{shard_id}.lock")
+        os.makedirs(self.state_dir, exist_ok=True)
+        with open(lock_path, 'w') as f:
+            json.dump({'worker': worker}, f)
+        stamp = time.time() - age
+        os.utime(lock_path, (stamp, stamp))
+        return lock_path
+
+    def test_parallel_workers_build_each_shard_once(self):
+        results = [self._finish(process) for process in [self._start_worker() for _ in range(4)]]
+
+        done = sorted(shard_id for returncode, result in results for shard_id in result['done'])
+        self.assertEqual(done, sorted(shard['id'] for shard in self.plan['shards']))
+        self.assertTrue(all(returncode == 0 and not result['failed'] for returncode, result in results))
+        self.assertTrue(indexingpro.plan_status(self.plan_path)['complete'])
+        self.assertTrue(indexingpro.audit_paths([self.carton_path], book_data=self.books)['ok'])
+
+    def test_failed_shard_is_retried_by_a_later_run(self):
+        os.makedirs(self.carton_path)
+        blocker = os.path.join(self.carton_path, indexingpro.book_folder_name("4321", "Book 0"))
+        open(blocker, 'w').close() # A file where the first book folder should go
+
+        returncode, result = self._run_worker()
+        self.assertEqual(returncode, 1)
+        self.assertEqual(result['failed'], ["0001"])
+        self.assertEqual(indexingpro.plan_status(self.plan_path)['failed'], ["0001"])
+
+        os.remove(blocker)
+        returncode, result = self._run_worker()
+        self.assertEqual(returncode, 0)
+        self.assertEqual(result['done'], ["0001"])
+        status = indexingpro.plan_status(self.plan_path)
+        self.assertTrue(status['complete'])
+        self.assertEqual(status['failed'], [])
+
+    def test_stale_lock_is_taken_over_only_with_stale_after(self):
+        self._write_lock("0001", "crashed-desk", age=3600)
+        self._write_lock("0002", "busy-desk", age=0)
+
+        returncode, result = self._run_worker()
+        self.assertNotIn("0001", result['done'])
+        self.assertEqual(indexingpro.plan_status(self.plan_path)['claimed'], ["0001", "0002"])
+
+        returncode, result = self._run_worker("--stale-after", "60")
+        self.assertEqual(result['done'], ["0001"])
+        status = indexingpro.plan_status(self.plan_path)
+        self.assertEqual(status['claimed'], ["0002"]) # A recently refreshed lock is left alone
+        self.assertEqual(indexingpro._lock_owner(os.path.join(self.state_dir, "shard-0002.lock")), "busy-desk")
+
+    def test_takeover_gives_back_a_lock_replaced_after_it_was_seen(self):
+        lock_path = self._write_lock("0001", "crashed-desk", age=3600)
+        real_rename = os.rename
+        calls = []
+
+        def rename(source, target):
+            if not calls:
+                # Another worker takes over the stale lock between our staleness check and our rename
+                os.remove(lock_path)
+                with open(lock_path, 'w') as f:
+                    json.dump({'worker': "other-desk"}, f)
+            calls.append((source, target))
+            real_rename(source, target)
+
+        with mock.patch.object(indexingpro.os, "rename", side_effect=rename):
+            self.assertFalse(indexingpro._claim_shard(self.state_dir, "0001", "me", stale_after=60))
+
+        self.assertEqual(len(calls), 2) # Moved away, then put back
+        self.assertEqual(indexingpro._lock_owner(lock_path), "other-desk")
+        self.assertEqual(sorted(os.listdir(self.state_dir)), ["shard-0001.lock"])
+
+
+if __name__ == "__main__":
+    unittest.main()